@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "core",
     "rest_framework",
     "rest_framework.authtoken",
@@ -53,6 +55,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.ServerTimingMiddleware",
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -86,16 +91,67 @@ WSGI_APPLICATION = "app.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds between requests
+# and checked before their first use in each request
+# (core.db.backends.postgresql). With DB_POOL_SIZE > 0 each process keeps
+# a pool of up to that many connections shared by its threads instead,
+# waiting up to DB_POOL_TIMEOUT seconds for a free one.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 0))
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "core.db.backends.postgresql",
         "NAME": os.environ.get("DB_NAME"),
         "HOST": os.environ.get("DB_HOST"),
         "USER": os.environ.get("DB_USER"),
         "PASSWORD": os.environ.get("DB_PASSWORD"),
+        "CONN_MAX_AGE": (
+            0 if DB_POOL_SIZE else int(os.environ.get("DB_CONN_MAX_AGE", 60))
+        ),
+        "CONN_HEALTH_CHECKS": bool(
+            int(os.environ.get("DB_CONN_HEALTH_CHECKS", 1))
+        ),
+        "POOL_SIZE": DB_POOL_SIZE,
+        "POOL_TIMEOUT": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
     }
 }
 
+# Read replicas, one per host in DB_REPLICA_HOSTS (comma separated), as
+# aliases replica1, replica2, ... Reads of recipes, tags and ingredients
+# while serving GET requests go to one of DATABASE_REPLICAS
+# (core.db.routers); a user who writes reads from the primary for the next
+# DATABASE_REPLICA_PIN_SECONDS, tracked in the
+# DATABASE_REPLICA_PIN_CACHE cache. That cache must be shared by all
+# workers: while it's local to each process reads stay on the primary and
+# the core.E001 system check fails.
+# Tests that need a second database get a replica1 on the primary's host
+# when no replica hosts are configured.
+DB_REPLICA_HOSTS = [
+    host
+    for host in os.environ.get("DB_REPLICA_HOSTS", "").split(",")
+    if host
+]
+TESTING = sys.argv[1:2] == ["test"]
+for number, host in enumerate(
+    DB_REPLICA_HOSTS or ([DATABASES["default"]["HOST"]] if TESTING else []),
+    start=1,
+):
+    DATABASES[f"replica{number}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "TEST": {"NAME": f"test_{DATABASES['default']['NAME']}_{number}"},
+    }
+DATABASE_REPLICAS = [
+    f"replica{number}" for number in range(1, len(DB_REPLICA_HOSTS) + 1)
+]
+DATABASE_ROUTERS = ["core.db.routers.PrimaryReplicaRouter"]
+DATABASE_REPLICA_PIN_SECONDS = int(
+    os.environ.get("DB_REPLICA_PIN_SECONDS", 15)
+)
+DATABASE_REPLICA_PIN_CACHE = os.environ.get(
+    "DB_REPLICA_PIN_CACHE", "default"
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -146,7 +202,140 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "core.User"
 
-REST_FRAMEWORK = {"DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema"}
+# Render and parse JSON with orjson (core.renderers, core.parsers). Both
+# fall back to the stdlib json module when orjson isn't installed.
+FAST_JSON = bool(int(os.environ.get("FAST_JSON", 1)))
+
+REST_FRAMEWORK = {
+    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": [
+        (
+            "core.renderers.FastJSONRenderer"
+            if FAST_JSON
+            else "rest_framework.renderers.JSONRenderer"
+        ),
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        (
+            "core.parsers.FastJSONParser"
+            if FAST_JSON
+            else "rest_framework.parsers.JSONParser"
+        ),
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+}
+
+# Recipe list pagination. Clients can ask for up to RECIPE_MAX_PAGE_SIZE
+# recipes per page with ?page_size=
+RECIPE_PAGE_SIZE = int(os.environ.get("RECIPE_PAGE_SIZE", 50))
+RECIPE_MAX_PAGE_SIZE = int(os.environ.get("RECIPE_MAX_PAGE_SIZE", 1000))
+
+# Maximum number of items accepted by /api/recipe/recipes/bulk/
+RECIPE_BULK_MAX_ITEMS = int(os.environ.get("RECIPE_BULK_MAX_ITEMS", 500))
+
+# Recipes per chunk streamed by /api/recipe/recipes/export/
+RECIPE_EXPORT_CHUNK_SIZE = int(
+    os.environ.get("RECIPE_EXPORT_CHUNK_SIZE", 1000)
+)
+
+# Build list responses straight from values() rows (recipe.fastpath)
+# instead of running the ModelSerializers over model instances. The output
+# is identical; set to 0 to fall back to the serializers.
+RECIPE_FAST_LISTS = bool(int(os.environ.get("RECIPE_FAST_LISTS", 1)))
+
+# Tag/ingredient autocomplete (?q=) returns RECIPE_AUTOCOMPLETE_LIMIT
+# suggestions, or up to RECIPE_AUTOCOMPLETE_MAX_LIMIT with ?limit=
+RECIPE_AUTOCOMPLETE_LIMIT = int(
+    os.environ.get("RECIPE_AUTOCOMPLETE_LIMIT", 10)
+)
+RECIPE_AUTOCOMPLETE_MAX_LIMIT = int(
+    os.environ.get("RECIPE_AUTOCOMPLETE_MAX_LIMIT", 50)
+)
+
+# Per-request timings (core.middleware.ServerTimingMiddleware) of a
+# SERVER_TIMING_SAMPLE_RATE share of requests (0 to 1). They name views
+# and count queries, so the Server-Timing header is only sent to staff
+# users unless SERVER_TIMING_HEADER is 1. Requests slower
+# than SERVER_TIMING_SLOW_MS are logged to the core.timing logger; set
+# SERVER_TIMING_LOG_LEVEL to INFO to log every sampled request.
+SERVER_TIMING_SAMPLE_RATE = float(
+    os.environ.get("SERVER_TIMING_SAMPLE_RATE", 1)
+)
+SERVER_TIMING_HEADER = bool(int(os.environ.get("SERVER_TIMING_HEADER", 0)))
+SERVER_TIMING_SLOW_MS = float(os.environ.get("SERVER_TIMING_SLOW_MS", 500))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "core.timing": {
+            "handlers": ["console"],
+            "level": os.environ.get("SERVER_TIMING_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+    },
+}
+
+# Readiness checks (core.health) behind /api/health/ready. Results are
+# cached for HEALTH_CHECK_CACHE_TTL seconds. The database check fails when
+# SELECT 1 takes longer than HEALTH_DB_MAX_LATENCY_MS or when connections
+# reach HEALTH_DB_MAX_CONNECTIONS_RATIO of max_connections; the media check
+# when MEDIA_ROOT has less than HEALTH_MEDIA_MIN_FREE_MB free.
+HEALTH_CHECK_CACHE_TTL = float(os.environ.get("HEALTH_CHECK_CACHE_TTL", 5))
+HEALTH_DB_MAX_LATENCY_MS = float(
+    os.environ.get("HEALTH_DB_MAX_LATENCY_MS", 500)
+)
+HEALTH_DB_MAX_CONNECTIONS_RATIO = float(
+    os.environ.get("HEALTH_DB_MAX_CONNECTIONS_RATIO", 0.95)
+)
+HEALTH_MEDIA_MIN_FREE_MB = int(
+    os.environ.get("HEALTH_MEDIA_MIN_FREE_MB", 100)
+)
+
+# /api/metrics is only served to scrapers sending METRICS_TOKEN as a
+# bearer token (Authorization: Bearer <token>), and not at all without one.
+# The token also shows the details of /api/health/ready.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Token authentication cache (core.authentication). Each process keeps up
+# to TOKEN_AUTH_CACHE_SIZE tokens for TOKEN_AUTH_CACHE_TTL seconds. Set
+# TOKEN_AUTH_SHARED_CACHE to a CACHES alias to share lookups between
+# processes as well, for TOKEN_AUTH_SHARED_CACHE_TTL seconds.
+# Deleting a token or changing its user evicts it from the shared cache
+# and from the cache of the process that made the change only: other
+# processes keep accepting a revoked token for up to TOKEN_AUTH_CACHE_TTL
+# seconds, hence the short default.
+TOKEN_AUTH_CACHE_SIZE = int(os.environ.get("TOKEN_AUTH_CACHE_SIZE", 10000))
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get("TOKEN_AUTH_CACHE_TTL", 5))
+TOKEN_AUTH_SHARED_CACHE = os.environ.get("TOKEN_AUTH_SHARED_CACHE") or None
+TOKEN_AUTH_SHARED_CACHE_TTL = int(
+    os.environ.get("TOKEN_AUTH_SHARED_CACHE_TTL", 60)
+)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Per-user response cache of the recipe, tag and ingredient lists
+# (recipe.cache). Off by default: the local-memory cache is private to
+# each uWSGI worker, so a write through one worker leaves the others
+# serving stale lists until RECIPE_RESPONSE_CACHE_TIMEOUT. Point
+# RECIPE_RESPONSE_CACHE_ALIAS at a shared cache before enabling it with
+# more than one worker.
+RECIPE_RESPONSE_CACHE_ENABLED = bool(
+    int(os.environ.get("RECIPE_RESPONSE_CACHE_ENABLED", 0))
+)
+RECIPE_RESPONSE_CACHE_ALIAS = os.environ.get(
+    "RECIPE_RESPONSE_CACHE_ALIAS", "default"
+)
+RECIPE_RESPONSE_CACHE_TIMEOUT = int(
+    os.environ.get("RECIPE_RESPONSE_CACHE_TIMEOUT", 300)
+)
 
 # Upload image through browsable interface
 SPECTACULAR_SETTINGS = {"COMPONENT_SPLIT_REQUEST": True}
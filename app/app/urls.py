@@ -27,6 +27,9 @@ from core import views as core_views
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/health-check", core_views.health_check, name="health-check"),
+    path("api/health/live", core_views.liveness, name="health-live"),
+    path("api/health/ready", core_views.readiness, name="health-ready"),
+    path("api/metrics", core_views.metrics, name="metrics"),
     path("api/schema/", SpectacularAPIView.as_view(), name="api-schema"),
     path("api/user/", include("user.urls")),
     path("api/recipe/", include("recipe.urls")),
@@ -14,3 +14,14 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+try:
+    import uwsgi
+except ImportError:  # Not served by uWSGI
+    uwsgi = None
+
+if uwsgi is not None:
+    from core.metrics import mark_process_dead
+
+    # Run by each worker as it exits, also when uWSGI recycles it
+    uwsgi.atexit = mark_process_dead
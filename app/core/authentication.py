@@ -0,0 +1,178 @@
+# Token authentication with an in-process cache in front of the database
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    """
+    Thread-safe LRU cache of user_id-keyed entries with TTL expiry.
+
+    Entries are evicted when a token is deleted or its user changes (see
+    core.signals). Other processes only notice when their entry expires,
+    so TTL bounds how long a revoked token keeps working in them.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_user(self, user_id):
+        with self._lock:
+            stale = [
+                key
+                for key, (_, entry) in self._entries.items()
+                if entry["user_id"] == user_id
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+token_cache = TokenCache(
+    settings.TOKEN_AUTH_CACHE_SIZE, settings.TOKEN_AUTH_CACHE_TTL
+)
+
+
+def shared_cache():
+    """The cache shared by all processes, if one is configured."""
+    alias = settings.TOKEN_AUTH_SHARED_CACHE
+    return caches[alias] if alias else None
+
+
+def shared_cache_key(key):
+    # Don't leak the bearer tokens themselves into the cache server
+    return "auth-token:" + hashlib.sha256(key.encode()).hexdigest()
+
+
+def cache_entry(user, token):
+    """
+    What is cached of an authenticated (user, token) pair.
+
+    Plain field values rather than the instances, which requests may
+    change, and without the password hash.
+    """
+    return {
+        "user_id": user.pk,
+        "db": user._state.db,
+        "user": {
+            field.attname: getattr(user, field.attname)
+            for field in user._meta.concrete_fields
+            if field.attname != "password"
+        },
+        "token": {"key": token.key, "created": token.created},
+    }
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for TokenAuthentication.
+
+    Lookups go to the per-process cache first, then to the shared cache
+    (TOKEN_AUTH_SHARED_CACHE) and only then to the database. Every
+    request gets its own user and token instances.
+    """
+
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        if entry is not None:
+            return self._from_entry(entry)
+
+        shared = shared_cache()
+        if shared is not None:
+            entry = shared.get(shared_cache_key(key))
+            if entry is not None:
+                token_cache.set(key, entry)
+                return self._from_entry(entry)
+
+        user, token = super().authenticate_credentials(key)
+
+        entry = cache_entry(user, token)
+        token_cache.set(key, entry)
+        if shared is not None:
+            shared.set(
+                shared_cache_key(key),
+                entry,
+                timeout=settings.TOKEN_AUTH_SHARED_CACHE_TTL,
+            )
+        return user, token
+
+    def _from_entry(self, entry):
+        # The password is deferred: loaded if a request needs it, and
+        # left out when the user is saved unless the request set it
+        names = list(entry["user"])
+        user = get_user_model().from_db(
+            entry["db"], names, [entry["user"][name] for name in names]
+        )
+        token = self.get_model()(user=user, **entry["token"])
+        return user, token
+
+    @staticmethod
+    def cache_stats():
+        return token_cache.stats()
+
+
+def invalidate_token(key):
+    token_cache.delete(key)
+    shared = shared_cache()
+    if shared is not None:
+        shared.delete(shared_cache_key(key))
+
+
+def invalidate_user(user):
+    token_cache.delete_user(user.pk)
+    shared = shared_cache()
+    if shared is not None:
+        from rest_framework.authtoken.models import Token
+
+        keys = Token.objects.filter(user=user).values_list("key", flat=True)
+        shared.delete_many([shared_cache_key(key) for key in keys])
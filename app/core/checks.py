@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from core.db import routers
+
+
+@register(Tags.database, Tags.caches)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Replicas need a pin cache every worker process can see."""
+    if not settings.DATABASE_REPLICAS or routers.pins_shared():
+        return []
+    alias = settings.DATABASE_REPLICA_PIN_CACHE
+    return [
+        Error(
+            f"DATABASE_REPLICA_PIN_CACHE ({alias!r}) is local to each "
+            "process, so a user who writes through one worker could read "
+            "a lagging replica through another.",
+            hint=(
+                "Point DB_REPLICA_PIN_CACHE at a CACHES alias shared by all "
+                "workers, such as memcached or Redis, or unset "
+                "DB_REPLICA_HOSTS. Reads go to the primary until then."
+            ),
+            id="core.E001",
+        )
+    ]
@@ -0,0 +1,134 @@
+# PostgreSQL backend with connection health checks and optional pooling.
+#
+# Settings of the database, besides Django's:
+#   CONN_HEALTH_CHECKS  Check a persistent connection (CONN_MAX_AGE) with
+#                       SELECT 1 before its first use in each request and
+#                       reconnect if it has gone away, as Django does from
+#                       version 4.1 on.
+#   POOL_SIZE           Keep up to this many connections per process in a
+#                       core.db.pool.ConnectionPool shared by its threads;
+#                       0 disables pooling. Connections go back to the pool
+#                       when Django closes them, so use CONN_MAX_AGE = 0.
+#   POOL_TIMEOUT        Seconds to wait for a free pooled connection.
+import os
+import threading
+
+import psycopg2.extensions
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.postgresql import base
+
+from core import metrics
+from core.db.pool import ConnectionPool, PoolTimeout
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, connect, size, timeout):
+    """The process's pool for alias, a new one in forked processes."""
+    key = (alias, os.getpid())
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(connect, size, timeout)
+        return _pools[key]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, settings_dict, alias=DEFAULT_DB_ALIAS):
+        super().__init__(settings_dict, alias)
+        self.health_check_done = False
+        # The pool connections are checked out from, when pooling
+        self.pool = None
+
+    @property
+    def pool_size(self):
+        return self.settings_dict.get("POOL_SIZE") or 0
+
+    def get_new_connection(self, conn_params):
+        if not self.pool_size:
+            connection = super().get_new_connection(conn_params)
+            metrics.DB_CONNECTIONS.labels("opened").inc()
+            return connection
+
+        pool = get_pool(
+            self.alias,
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            ),
+            self.pool_size,
+            self.settings_dict.get("POOL_TIMEOUT", 10),
+        )
+        self.pool = pool
+        while True:
+            try:
+                connection, waited, reused = pool.get()
+            except PoolTimeout as exc:
+                raise base.Database.OperationalError(str(exc)) from exc
+            metrics.DB_POOL_WAIT.observe(waited)
+            if not reused:
+                metrics.DB_CONNECTIONS.labels("opened").inc()
+                return connection
+
+            if self._usable(connection):
+                metrics.DB_CONNECTIONS.labels("reused").inc()
+                # As super().get_new_connection() sets it for new ones
+                self.isolation_level = self.settings_dict["OPTIONS"].get(
+                    "isolation_level", connection.isolation_level
+                )
+                return connection
+
+            # Dropped by the server while idle, try the next one
+            pool.put(connection, discard=True)
+            metrics.DB_CONNECTIONS.labels("closed").inc()
+
+    def _usable(self, connection):
+        if connection.closed:
+            return False
+        if not self.settings_dict.get("CONN_HEALTH_CHECKS"):
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except base.Database.Error:
+            return False
+        return True
+
+    def _close(self):
+        if self.connection is None:
+            return
+        if not self.pool_size:
+            metrics.DB_CONNECTIONS.labels("closed").inc()
+            return super()._close()
+
+        connection = self.connection
+        discard = self.errors_occurred
+        if not discard and not connection.closed:
+            status = connection.info.transaction_status
+            if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    connection.rollback()
+                except base.Database.Error:
+                    discard = True
+        if not self.pool.put(connection, discard=discard):
+            metrics.DB_CONNECTIONS.labels("closed").inc()
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Check a persistent connection again before its next use
+        self.health_check_done = False
+
+    def _cursor(self, name=None):
+        if (
+            self.connection is not None
+            and not self.health_check_done
+            and self.settings_dict.get("CONN_HEALTH_CHECKS")
+            and not self.in_atomic_block
+        ):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        return super()._cursor(name)
@@ -0,0 +1,75 @@
+# In-process database connection pool, used by core.db.backends.postgresql
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of up to max_size connections made by connect().
+
+    get() blocks for up to timeout seconds while every connection is
+    checked out. Idle connections are reused most recently returned
+    first, so rarely needed ones are left idle and can be dropped by the
+    server without being handed out again.
+    """
+
+    def __init__(self, connect, max_size, timeout):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+
+    def get(self):
+        """(connection, seconds waited, whether it was reused)."""
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(
+                f"No database connection free after {self.timeout}s "
+                f"({self.max_size} in use)"
+            )
+        waited = time.perf_counter() - start
+
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+        if connection is not None:
+            return connection, waited, True
+
+        try:
+            return self.connect(), waited, False
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def put(self, connection, discard=False):
+        """
+        Return a checked out connection, closing it instead when discard
+        is true or it was closed. Returns whether it was kept.
+        """
+        try:
+            if discard or connection.closed:
+                if not connection.closed:
+                    connection.close()
+                return False
+
+            with self._lock:
+                self._idle.append(connection)
+            return True
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close the idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def idle(self):
+        with self._lock:
+            return len(self._idle)
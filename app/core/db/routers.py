@@ -0,0 +1,112 @@
+# Send reads of recipes, tags and ingredients made while serving safe
+# requests to a read replica (DATABASE_REPLICAS), everything else to the
+# primary. A user who made an unsafe request is pinned to the primary for
+# DATABASE_REPLICA_PIN_SECONDS, long enough for the replicas to catch up,
+# so they always read their own writes. Pins must be visible to every
+# worker, so nothing is routed while DATABASE_REPLICA_PIN_CACHE is local
+# to each process (see core.checks).
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+ROUTED_MODELS = {"core.Recipe", "core.Tag", "core.Ingredient"}
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Cache backends whose pins other worker processes wouldn't see
+LOCAL_CACHE_BACKENDS = (LocMemCache, DummyCache)
+
+# State of the request being served, set by
+# core.middleware.ReplicaRoutingMiddleware
+request_state = contextvars.ContextVar("request_state", default=None)
+
+
+def atomic_depth():
+    """How many atomic blocks of the primary are open."""
+    connection = connections[DEFAULT_DB_ALIAS]
+    if not connection.in_atomic_block:
+        return 0
+    return len(connection.savepoint_ids) + 1
+
+
+class RequestState:
+    def __init__(self, request):
+        self.request = request
+        # Transactions already open when the request came in (as in
+        # TestCase) don't hold any of the request's writes
+        self.atomic_depth = atomic_depth()
+        # Decided on the first routed read, after authentication
+        self.pinned = None
+        self.replica = None
+
+
+def _pin_key(user_id):
+    return f"db-pin:{user_id}"
+
+
+def pin_cache():
+    return caches[settings.DATABASE_REPLICA_PIN_CACHE]
+
+
+def pin(user_id):
+    """Send the user's reads to the primary for a while."""
+    pin_cache().set(
+        _pin_key(user_id), True, settings.DATABASE_REPLICA_PIN_SECONDS
+    )
+
+
+def is_pinned(user_id):
+    return pin_cache().get(_pin_key(user_id)) is not None
+
+
+def pins_shared():
+    """Whether pins set by one worker process are seen by the others."""
+    return not isinstance(pin_cache(), LOCAL_CACHE_BACKENDS)
+
+
+def is_routed(model):
+    # Many-to-many through models go with the model that declares them
+    owner = model._meta.auto_created or model
+    return owner._meta.label in ROUTED_MODELS
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = request_state.get()
+        if (
+            state is None
+            or not settings.DATABASE_REPLICAS
+            or not pins_shared()
+            or state.request.method not in SAFE_METHODS
+            or not is_routed(model)
+            # Reads in a transaction must see its writes
+            or atomic_depth() > state.atomic_depth
+        ):
+            return DEFAULT_DB_ALIAS
+
+        if state.pinned is None:
+            user = getattr(state.request, "user", None)
+            state.pinned = bool(
+                user is not None
+                and user.is_authenticated
+                and is_pinned(user.pk)
+            )
+        if state.pinned:
+            return DEFAULT_DB_ALIAS
+
+        # One replica per request, for consistent reads within it
+        if state.replica is None:
+            state.replica = random.choice(settings.DATABASE_REPLICAS)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS if is_routed(model) else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= aliases:
+            return True
+        return None
@@ -0,0 +1,119 @@
+# Readiness checks of the dependencies the API needs to serve traffic,
+# served by core.views.readiness
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+logger = logging.getLogger("core.health")
+
+
+class CheckFailed(Exception):
+    pass
+
+
+def check_database():
+    """Round trip of a trivial query, failing when it's too slow."""
+    connection = connections[DEFAULT_DB_ALIAS]
+    start = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    latency = (time.perf_counter() - start) * 1000
+    if latency > settings.HEALTH_DB_MAX_LATENCY_MS:
+        raise CheckFailed(f"SELECT 1 took {latency:.0f}ms")
+    return {"latency_ms": round(latency, 2)}
+
+
+def check_connections():
+    """Headroom below the server's max_connections (PostgreSQL only)."""
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != "postgresql":
+        connection.ensure_connection()
+        return {}
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*), current_setting('max_connections')::int "
+            "FROM pg_stat_activity"
+        )
+        used, maximum = cursor.fetchone()
+    if used >= maximum * settings.HEALTH_DB_MAX_CONNECTIONS_RATIO:
+        raise CheckFailed(f"{used} of {maximum} connections in use")
+    return {"used": used, "max": maximum}
+
+
+def check_migrations():
+    """No migrations left to apply."""
+    executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    if plan:
+        raise CheckFailed(
+            f"{len(plan)} unapplied migrations, e.g. {plan[0][0]}"
+        )
+    return {}
+
+
+def check_media():
+    """MEDIA_ROOT accepts a write and has space left."""
+    with tempfile.NamedTemporaryFile(dir=settings.MEDIA_ROOT) as f:
+        f.write(b"ready")
+        f.flush()
+        os.fsync(f.fileno())
+
+    free = shutil.disk_usage(settings.MEDIA_ROOT).free // (1024 * 1024)
+    if free < settings.HEALTH_MEDIA_MIN_FREE_MB:
+        raise CheckFailed(f"{free}MB free")
+    return {"free_mb": free}
+
+
+CHECKS = {
+    "database": check_database,
+    "connections": check_connections,
+    "migrations": check_migrations,
+    "media": check_media,
+}
+
+_lock = threading.Lock()
+_cached = {"expires": 0.0, "results": None}
+
+
+def run_checks():
+    """
+    Results of every check, {name: {"ok": ..., "ms": ..., ...}}, and
+    whether they came from the cache. Results are kept for
+    HEALTH_CHECK_CACHE_TTL seconds so frequent probes from several load
+    balancers cost one round of checks.
+    """
+    with _lock:
+        if _cached["expires"] > time.monotonic():
+            return _cached["results"], True
+
+        results = {}
+        for name, check in CHECKS.items():
+            start = time.perf_counter()
+            try:
+                result = {"ok": True, **check()}
+            except Exception as exc:
+                result = {"ok": False, "error": str(exc) or repr(exc)}
+                logger.warning(
+                    "Readiness check %s failed: %s", name, result["error"]
+                )
+            result["ms"] = round((time.perf_counter() - start) * 1000, 2)
+            results[name] = result
+
+        _cached["results"] = results
+        _cached["expires"] = time.monotonic() + settings.HEALTH_CHECK_CACHE_TTL
+        return results, False
+
+
+def clear_cache():
+    with _lock:
+        _cached["expires"] = 0.0
+        _cached["results"] = None
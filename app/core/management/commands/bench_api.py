@@ -0,0 +1,284 @@
+# Benchmark the API through its real URL routes, middleware and
+# authentication, against a seeded database (see seed_bench), e.g.
+#   python manage.py bench_api --user bench0@example.com \
+#       --save-baseline bench.json
+#   python manage.py bench_api --user bench0@example.com \
+#       --baseline bench.json --threshold 20
+#
+# Everything runs in a transaction that is rolled back, so the user's
+# password, token and the recipes created or updated don't persist.
+import json
+import math
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+PASSWORD = "bench-api-password"
+
+# Measures compared against a baseline; queries must not grow at all
+COMPARED = ("p50_ms", "p95_ms", "memory_kib")
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(timings, percent):
+    """Nearest-rank percentile of sorted timings."""
+    rank = math.ceil(percent / 100 * len(timings))
+    return timings[max(rank, 1) - 1]
+
+
+def count_queries(queries):
+    """An execute wrapper appending the SQL it runs to queries."""
+
+    def wrapper(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    return wrapper
+
+
+class Command(BaseCommand):
+    help = (
+        "Report throughput, p50/p95/p99 latency, queries and allocated "
+        "memory per API endpoint, and compare them with a JSON baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            default="bench0@example.com",
+            help="Email of a user with recipes",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=50,
+            help="Timed requests per endpoint",
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=5, help="Untimed requests first"
+        )
+        parser.add_argument(
+            "--endpoints", help="Comma separated subset of endpoints"
+        )
+        parser.add_argument("--save-baseline", help="Write results here")
+        parser.add_argument("--baseline", help="Compare with these results")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=20,
+            help="Allowed regression over the baseline, in percent",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options["user"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(
+                f"No user with email {options['user']}, run seed_bench"
+            )
+
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+
+        hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+        try:
+            with override_settings(ALLOWED_HOSTS=hosts), transaction.atomic():
+                results = self._run(user, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+        self._report(results, baseline)
+
+        if options["save_baseline"]:
+            with open(options["save_baseline"], "w") as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Saved baseline to {options['save_baseline']}")
+
+        if baseline is not None:
+            regressions = self._regressions(
+                results, baseline, options["threshold"]
+            )
+            if regressions:
+                raise CommandError(
+                    "Regressions over the baseline:\n" + "\n".join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS("No regressions"))
+
+    def _endpoints(self, user):
+        """name: (method, path, request data factory)"""
+        recipe_ids = list(
+            Recipe.objects.filter(user=user)
+            .order_by("-id")
+            .values_list("id", flat=True)[:20]
+        )
+        if not recipe_ids:
+            raise CommandError(f"{user.email} has no recipes, run seed_bench")
+
+        def detail(n):
+            return reverse(
+                "recipe:recipe-detail", args=[recipe_ids[n % len(recipe_ids)]]
+            )
+
+        counter = iter(range(10**9))
+        return {
+            "recipe-list": (
+                "get",
+                lambda: reverse("recipe:recipe-list"),
+                None,
+            ),
+            "recipe-detail": ("get", lambda: detail(next(counter)), None),
+            "recipe-create": (
+                "post",
+                lambda: reverse("recipe:recipe-list"),
+                lambda: {
+                    "title": f"Bench recipe {next(counter)}",
+                    "time_minutes": 10,
+                    "price": "5.00",
+                    "tags": [{"name": "Bench"}, {"name": "Quick"}],
+                    "ingredients": [{"name": "Salt"}, {"name": "Pepper"}],
+                },
+            ),
+            "recipe-update": (
+                "patch",
+                lambda: detail(next(counter)),
+                lambda: {"title": f"Bench update {next(counter)}"},
+            ),
+            "tag-list": ("get", lambda: reverse("recipe:tag-list"), None),
+            "ingredient-list": (
+                "get",
+                lambda: reverse("recipe:ingredient-list"),
+                None,
+            ),
+            "token": (
+                "post",
+                lambda: reverse("user:token"),
+                lambda: {"email": user.email, "password": PASSWORD},
+            ),
+            "health-check": ("get", lambda: reverse("health-check"), None),
+            "schema": ("get", lambda: reverse("api-schema"), None),
+        }
+
+    def _run(self, user, options):
+        user.set_password(PASSWORD)
+        user.save(update_fields=["password"])
+        token, _ = Token.objects.get_or_create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        endpoints = self._endpoints(user)
+        if options["endpoints"]:
+            names = options["endpoints"].split(",")
+            unknown = set(names) - set(endpoints)
+            if unknown:
+                raise CommandError(
+                    f"Unknown endpoints: {', '.join(sorted(unknown))}"
+                )
+            endpoints = {name: endpoints[name] for name in names}
+
+        results = {}
+        for name, (method, path, data) in endpoints.items():
+
+            def request():
+                response = getattr(client, method)(
+                    path(), data() if data else None, format="json"
+                )
+                if response.status_code >= 400:
+                    raise CommandError(
+                        f"{name}: {response.status_code} {response.content!r}"
+                    )
+                return response
+
+            results[name] = self._measure(
+                request, options["requests"], options["warmup"]
+            )
+        return results
+
+    def _measure(self, request, count, warmup):
+        for _ in range(warmup):
+            request()
+
+        timings = []
+        started = time.perf_counter()
+        for _ in range(count):
+            start = time.perf_counter()
+            request()
+            timings.append((time.perf_counter() - start) * 1000)
+        elapsed = time.perf_counter() - started
+        timings.sort()
+
+        # Separately, as tracing slows down the timed requests. Counted
+        # with a wrapper as each request resets connection.queries.
+        queries = []
+        with connection.execute_wrapper(count_queries(queries)):
+            request()
+        tracemalloc.start()
+        try:
+            request()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "requests_per_s": round(count / elapsed, 1),
+            "p50_ms": round(percentile(timings, 50), 2),
+            "p95_ms": round(percentile(timings, 95), 2),
+            "p99_ms": round(percentile(timings, 99), 2),
+            "queries": len(queries),
+            "memory_kib": round(peak / 1024, 1),
+        }
+
+    def _report(self, results, baseline):
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"{'endpoint':<16} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+                f"{'p99 ms':>8} {'queries':>7} {'KiB':>8}"
+            )
+        )
+        for name, result in results.items():
+            line = (
+                f"{name:<16} {result['requests_per_s']:>8} "
+                f"{result['p50_ms']:>8} {result['p95_ms']:>8} "
+                f"{result['p99_ms']:>8} {result['queries']:>7} "
+                f"{result['memory_kib']:>8}"
+            )
+            if baseline and name in baseline:
+                before = baseline[name]["p95_ms"]
+                change = (result["p95_ms"] - before) / before * 100
+                line += f"  p95 {change:+.0f}%"
+            self.stdout.write(line)
+
+    def _regressions(self, results, baseline, threshold):
+        regressions = []
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            before = baseline[name]
+            if result["queries"] > before["queries"]:
+                regressions.append(
+                    f"{name}: {result['queries']} queries, "
+                    f"was {before['queries']}"
+                )
+            for measure in COMPARED:
+                limit = before[measure] * (1 + threshold / 100)
+                if result[measure] > limit:
+                    regressions.append(
+                        f"{name}: {measure} {result[measure]}, "
+                        f"was {before[measure]}"
+                    )
+        return regressions
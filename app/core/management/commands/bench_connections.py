@@ -0,0 +1,87 @@
+# Compare the per-request cost of database connection handling, e.g.
+#   python manage.py bench_connections --requests 500
+#
+# Each simulated request runs SELECT 1 between the connection checks
+# Django makes when a request starts and finishes, with:
+#   new         a connection per request (CONN_MAX_AGE = 0)
+#   persistent  one connection kept open (CONN_MAX_AGE = None)
+#   checked     persistent, checked with SELECT 1 in each request
+#   pooled      checked out of and returned to core.db.pool per request
+# The last two need the core.db.backends.postgresql backend.
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+
+from core.management.commands.bench_api import percentile
+
+MODES = {
+    "new": {"CONN_MAX_AGE": 0},
+    "persistent": {"CONN_MAX_AGE": None, "CONN_HEALTH_CHECKS": False},
+    "checked": {"CONN_MAX_AGE": None, "CONN_HEALTH_CHECKS": True},
+    "pooled": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": True, "POOL_SIZE": 1},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time requests with a new, persistent, health-checked or pooled "
+        "database connection and report the latency saved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        settings_dict = connections.databases[options["database"]]
+        backend = load_backend(settings_dict["ENGINE"])
+        # Health checks and pooling are features of core.db.backends
+        extended = hasattr(backend.DatabaseWrapper, "health_check_done")
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"{'mode':<12} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} "
+                f"{'saved ms':>9}"
+            )
+        )
+        baseline = None
+        for mode, overrides in MODES.items():
+            if not extended and mode in ("checked", "pooled"):
+                self.stdout.write(f"{mode:<12} needs core.db.backends")
+                continue
+
+            # Under the real alias, which connection_created receivers
+            # such as django.contrib.postgres's look up
+            wrapper = backend.DatabaseWrapper(
+                {**settings_dict, "POOL_SIZE": 0, **overrides},
+                alias=options["database"],
+            )
+            try:
+                timings = self._requests(wrapper, options["requests"])
+            finally:
+                wrapper.close()
+                if getattr(wrapper, "pool", None) is not None:
+                    wrapper.pool.close()
+
+            mean = statistics.mean(timings)
+            baseline = mean if baseline is None else baseline
+            self.stdout.write(
+                f"{mode:<12} {mean:>8.3f} {percentile(timings, 50):>8.3f} "
+                f"{percentile(timings, 95):>8.3f} {baseline - mean:>9.3f}"
+            )
+
+    def _requests(self, wrapper, count):
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            # What django.db.close_old_connections does around requests
+            wrapper.close_if_unusable_or_obsolete()
+            with wrapper.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            wrapper.close_if_unusable_or_obsolete()
+            timings.append((time.perf_counter() - start) * 1000)
+        return sorted(timings)
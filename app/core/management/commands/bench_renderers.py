@@ -0,0 +1,98 @@
+# Compare DRF's JSONRenderer with core.renderers.FastJSONRenderer on
+# recipe list pages of increasing size, e.g.
+#   python manage.py bench_renderers --rows 100,1000,10000
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import FastJSONRenderer, orjson
+
+
+def _sizes(value):
+    return [int(size) for size in value.split(",")]
+
+
+def recipe_page(size):
+    """A recipe list response body as the API returns it."""
+    return {
+        "next": "http://localhost:8000/api/recipe/recipes/?cursor=cD0xMjM0",
+        "previous": None,
+        "results": [
+            {
+                "id": i,
+                "title": f"Recipe {i} – crème brûlée",
+                "time_minutes": i % 240,
+                "price": f"{i % 100000 / 100:.2f}",
+                "link": f"https://example.com/recipes/{i}",
+                "description": "Lorem ipsum dolor sit amet. " * 10,
+                "tags": [
+                    {"id": i * 3 + n, "name": f"Tag {i * 3 + n}"}
+                    for n in range(3)
+                ],
+                "ingredients": [
+                    {"id": i * 5 + n, "name": f"Ingredient {i * 5 + n}"}
+                    for n in range(5)
+                ],
+            }
+            for i in range(size)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = "Time JSON rendering of recipe list pages with each renderer."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=_sizes,
+            default=[100, 1000, 10000],
+            help="Comma separated page sizes",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    "orjson isn't installed, FastJSONRenderer falls back to "
+                    "the stdlib json module"
+                )
+            )
+
+        renderers = {"json": JSONRenderer(), "orjson": FastJSONRenderer()}
+        for size in options["rows"]:
+            data = recipe_page(size)
+            outputs = {
+                name: renderer.render(data)
+                for name, renderer in renderers.items()
+            }
+            if len(set(outputs.values())) != 1:
+                raise CommandError(f"Renderers disagree on {size} rows")
+
+            megabytes = len(outputs["json"]) / 1024 / 1024
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"=== {size} rows, {megabytes:.2f}MB ==="
+                )
+            )
+            timings = {
+                name: self._best(renderer, data, options["repeat"])
+                for name, renderer in renderers.items()
+            }
+            for name, seconds in timings.items():
+                self.stdout.write(
+                    f"{name:<8} {seconds * 1000:9.2f}ms  "
+                    f"{megabytes / seconds:8.1f}MB/s  "
+                    f"{1 / seconds:9.1f} renders/s  "
+                    f"x{timings['json'] / seconds:.1f}"
+                )
+
+    def _best(self, renderer, data, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            renderer.render(data)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,75 @@
+# Report how often the planner uses each index and how bloated it is.
+# Only supported on PostgreSQL. Bloat is measured with pgstattuple when
+# the extension is installed (CREATE EXTENSION pgstattuple).
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+USAGE_SQL = """
+    SELECT s.relname, s.indexrelname, s.idx_scan, s.idx_tup_read,
+           pg_relation_size(s.indexrelid), i.indisunique
+    FROM pg_stat_user_indexes s
+    JOIN pg_index i ON i.indexrelid = s.indexrelid
+    WHERE s.relname LIKE %s
+    ORDER BY s.relname, s.indexrelname
+"""
+
+# Leaf pages of a freshly built btree index are ~90% full (the default
+# fillfactor). Anything below that is space lost to dead entries.
+BLOAT_SQL = "SELECT avg_leaf_density FROM pgstatindex(%s)"
+DEFAULT_LEAF_DENSITY = 90
+
+
+class Command(BaseCommand):
+    help = "Report index usage and bloat for the app's tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--table-prefix",
+            default="core_",
+            help="Only report indexes on tables starting with this prefix",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("index_stats requires PostgreSQL")
+
+        with connection.cursor() as cursor:
+            cursor.execute(USAGE_SQL, [f"{options['table_prefix']}%"])
+            rows = cursor.fetchall()
+            has_pgstattuple = self._has_pgstattuple(cursor)
+
+            self.stdout.write(
+                f"{'table':<28} {'index':<44} {'scans':>10} "
+                f"{'tuples read':>12} {'size':>10} {'bloat':>6}"
+            )
+            for table, index, scans, tuples, size, unique in rows:
+                bloat = "n/a"
+                if has_pgstattuple:
+                    bloat = f"{self._bloat(cursor, index):.0f}%"
+
+                line = (
+                    f"{table:<28} {index:<44} {scans:>10} {tuples:>12} "
+                    f"{size // 1024:>8}kB {bloat:>6}"
+                )
+                if scans == 0 and not unique:
+                    line = self.style.WARNING(f"{line}  (unused)")
+                self.stdout.write(line)
+
+        if not has_pgstattuple:
+            self.stdout.write(
+                "Install the pgstattuple extension to report bloat."
+            )
+
+    def _has_pgstattuple(self, cursor):
+        cursor.execute(
+            "SELECT 1 FROM pg_extension WHERE extname = 'pgstattuple'"
+        )
+        return cursor.fetchone() is not None
+
+    def _bloat(self, cursor, index):
+        cursor.execute(BLOAT_SQL, [index])
+        density = cursor.fetchone()[0]
+        # pgstatindex reports NaN for empty indexes
+        if density != density:
+            return 0
+        return max(0, DEFAULT_LEAF_DENSITY - density)
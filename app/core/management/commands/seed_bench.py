@@ -0,0 +1,292 @@
+# Generate a large, skewed dataset for load and scale testing, e.g.
+#   python manage.py seed_bench --users 10000 --recipes 10000000
+#
+# Users are named <prefix><rank>@example.com. Their numbers of recipes
+# follow a Zipf-like distribution by rank (<prefix>0 has the most), their
+# numbers of tags and ingredients grow with their recipes, and popular
+# tags/ingredients are linked far more often than the rest. The same
+# --seed always generates the same data.
+import functools
+import random
+import re
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.bulk import copy_rows, insert_rows, reserve_ids
+
+TAG_WORDS = (
+    "Vegan Vegetarian Quick Dinner Lunch Breakfast Dessert Spicy Healthy "
+    "Comfort Budget Family Italian Mexican Indian Thai Japanese Greek "
+    "Baking Grill Soup Salad Snack Party Summer Winter Gluten-free Keto"
+).split()
+INGREDIENT_WORDS = (
+    "Salt Pepper Garlic Onion Tomato Potato Carrot Celery Butter Olive-oil "
+    "Flour Sugar Egg Milk Cream Cheese Rice Pasta Chicken Beef Pork Tofu "
+    "Lentils Chickpeas Spinach Kale Basil Parsley Cumin Paprika Ginger "
+    "Lemon Lime Honey Yoghurt Mushroom Courgette Aubergine Coconut Chilli"
+).split()
+TITLE_WORDS = (
+    "Roasted Spiced Creamy Crispy Slow-cooked Smoky Fresh Classic Easy "
+    "Herby Zesty Baked"
+).split()
+DESCRIPTION_WORDS = (
+    "stir mix bake until golden serve with fresh herbs season to taste "
+    "simmer gently for minutes chop finely whisk together and rest"
+).split()
+
+# Share of recipes with 0, 1, 2, ... tags
+TAG_FANOUT = (10, 25, 30, 20, 10, 4, 1)
+
+
+@functools.lru_cache(maxsize=None)
+def zipf_cum_weights(count, exponent):
+    """Cumulative Zipf weights of ranks 1..count, for random.choices."""
+    total = 0.0
+    cum_weights = []
+    for rank in range(1, count + 1):
+        total += 1 / rank**exponent
+        cum_weights.append(total)
+    return cum_weights
+
+
+def zipf_counts(total, count, exponent):
+    """Split total into count Zipf-distributed parts, largest first."""
+    if not count:
+        return []
+    weights = [1 / rank**exponent for rank in range(1, count + 1)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for rank in range(total - sum(counts)):
+        counts[rank % count] += 1
+    return counts
+
+
+def unique_names(words, count):
+    """count distinct names: the words, then numbered variants."""
+    return [
+        words[i % len(words)]
+        + (f" {i // len(words) + 1}" if i >= len(words) else "")
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate users with Zipf-distributed numbers of recipes, tags and "
+        "ingredients, using COPY on PostgreSQL and executemany elsewhere."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument(
+            "--recipes", type=int, default=100000, help="Total recipes"
+        )
+        parser.add_argument(
+            "--zipf",
+            type=float,
+            default=1.1,
+            help="Skew exponent, higher concentrates data on fewer users",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument("--prefix", default="bench")
+        parser.add_argument(
+            "--password", help="Password of every user (default unusable)"
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.zipf = options["zipf"]
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        prefix = options["prefix"]
+
+        emails = get_user_model().objects.filter(
+            email__regex=rf"^{re.escape(prefix)}[0-9]+@example\.com$"
+        )
+        if emails.exists():
+            raise CommandError(
+                f"Users {prefix}<rank>@example.com exist, "
+                "pass another --prefix"
+            )
+
+        started = time.monotonic()
+        recipe_counts = zipf_counts(
+            options["recipes"], options["users"], self.zipf
+        )
+        user_ids = self._create_users(
+            prefix, len(recipe_counts), options["password"]
+        )
+
+        created = 0
+        for user_id, count in zip(user_ids, recipe_counts):
+            tags = self._create_names(
+                Tag,
+                user_id,
+                TAG_WORDS,
+                min(500, max(3, round(2 * count**0.5))),
+            )
+            ingredients = self._create_names(
+                Ingredient,
+                user_id,
+                INGREDIENT_WORDS,
+                min(2000, max(5, round(4 * count**0.5))),
+            )
+            for offset in range(0, count, self.batch_size):
+                size = min(self.batch_size, count - offset)
+                with transaction.atomic():
+                    self._create_recipes(user_id, size, tags, ingredients)
+                created += size
+                rate = created / (time.monotonic() - started)
+                self.stdout.write(f"{created} recipes, {rate:.0f}/s")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(user_ids)} users and {created} recipes in "
+                f"{time.monotonic() - started:.1f}s"
+            )
+        )
+
+    def _insert(self, model, fields, rows):
+        """INSERT rows of values for fields, returning their new ids."""
+        if connection.vendor == "postgresql":
+            ids = reserve_ids(model, len(rows))
+            copy_rows(
+                model,
+                ("id", *fields),
+                ((pk, *row) for pk, row in zip(ids, rows)),
+            )
+            return ids
+
+        # Inserted in order after the current last row (no concurrent
+        # writers while seeding), so their ids can be read back
+        last = model.objects.order_by("-pk").values_list("pk", flat=True)
+        last = last.first() or 0
+        insert_rows(model, fields, rows)
+        return list(
+            model.objects.filter(pk__gt=last)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+    def _create_users(self, prefix, count, password):
+        # Hashed once: hashing a password per user would dominate
+        password = make_password(password)
+        users = [
+            get_user_model()(
+                email=f"{prefix}{rank}@example.com",
+                name=f"Bench user {rank}",
+                password=password,
+            )
+            for rank in range(count)
+        ]
+        get_user_model().objects.bulk_create(users, batch_size=1000)
+        ids = dict(
+            get_user_model()
+            .objects.filter(email__startswith=prefix)
+            .values_list("email", "id")
+        )
+        return [ids[user.email] for user in users]
+
+    def _create_names(self, model, user_id, words, count):
+        """Create count tags/ingredients, returned most popular first."""
+        names = unique_names(words, count)
+        self.rng.shuffle(names)
+        return self._insert(
+            model,
+            ("user_id", "name", "updated_at"),
+            [(user_id, name, self.now) for name in names],
+        )
+
+    def _pick(self, ids, count):
+        """Up to count distinct ids, favouring the first (popular) ones."""
+        if not ids or count <= 0:
+            return []
+        picked = self.rng.choices(
+            ids, cum_weights=zipf_cum_weights(len(ids), self.zipf), k=count
+        )
+        return list(dict.fromkeys(picked))
+
+    def _create_recipes(self, user_id, count, tags, ingredients):
+        rng = self.rng
+        rows = []
+        links = []
+        for _ in range(count):
+            title = (
+                f"{rng.choice(TITLE_WORDS)} "
+                f"{rng.choice(INGREDIENT_WORDS).lower()} and "
+                f"{rng.choice(INGREDIENT_WORDS).lower()}"
+            )
+            description = " ".join(
+                rng.choices(DESCRIPTION_WORDS, k=int(rng.expovariate(1 / 40)))
+            ).capitalize()
+            link = (
+                f"https://example.com/{rng.getrandbits(32):08x}"
+                if rng.random() < 0.3
+                else ""
+            )
+            rows.append(
+                (
+                    user_id,
+                    title,
+                    description,
+                    Decimal(rng.randint(100, 5000)) / 100,
+                    link,
+                    rng.choice((5, 10, 15, 20, 30, 45, 60, 90, 120, 240)),
+                    self.now,
+                )
+            )
+            links.append(
+                (
+                    self._pick(
+                        tags,
+                        rng.choices(range(len(TAG_FANOUT)), TAG_FANOUT)[0],
+                    ),
+                    self._pick(ingredients, max(1, round(rng.gauss(7, 3)))),
+                )
+            )
+
+        recipe_ids = self._insert(
+            Recipe,
+            (
+                "user_id",
+                "title",
+                "description",
+                "price",
+                "link",
+                "time_minutes",
+                "updated_at",
+            ),
+            rows,
+        )
+        self._insert_links(
+            Recipe.tags.through,
+            "tag_id",
+            (
+                (recipe_id, tag_id)
+                for recipe_id, (tag_ids, _) in zip(recipe_ids, links)
+                for tag_id in tag_ids
+            ),
+        )
+        self._insert_links(
+            Recipe.ingredients.through,
+            "ingredient_id",
+            (
+                (recipe_id, ingredient_id)
+                for recipe_id, (_, ingredient_ids) in zip(recipe_ids, links)
+                for ingredient_id in ingredient_ids
+            ),
+        )
+
+    def _insert_links(self, through, column, rows):
+        if connection.vendor == "postgresql":
+            copy_rows(through, ("recipe_id", column), rows)
+        else:
+            insert_rows(through, ("recipe_id", column), rows)
@@ -0,0 +1,122 @@
+# Prometheus metrics, served by core.views.metrics.
+#
+# With PROMETHEUS_MULTIPROC_DIR set (scripts/run.sh) every uWSGI worker
+# writes its values to files in that directory and a scrape of any worker
+# aggregates them, so /api/metrics returns totals for all workers. Workers
+# call mark_process_dead() as they exit (app/wsgi.py) so that the gauges
+# stop counting their last values.
+import os
+import time
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    multiprocess,
+)
+
+from core.authentication import token_cache
+
+# Seconds between updates of the process memory gauge
+MEMORY_INTERVAL = 10
+
+REQUESTS = Counter(
+    "app_requests_total",
+    "Requests by view, method and status code",
+    ["view", "method", "status"],
+)
+LATENCY = Histogram(
+    "app_request_duration_seconds",
+    "Request latency by view",
+    ["view", "method"],
+)
+QUERIES = Histogram(
+    "app_request_queries",
+    "Database queries per request by view",
+    ["view", "method"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float("inf")),
+)
+# Gauges set to each worker's own TokenCache counts, summed over workers
+TOKEN_CACHE_LOOKUPS = Gauge(
+    "app_token_cache_lookups",
+    "Token authentication cache lookups since the workers started",
+    ["result"],
+    multiprocess_mode="livesum",
+)
+TOKEN_CACHE_SIZE = Gauge(
+    "app_token_cache_size",
+    "Tokens in the authentication caches of all workers",
+    multiprocess_mode="livesum",
+)
+MEMORY = Gauge(
+    "app_process_resident_memory_bytes",
+    "Resident memory of all workers",
+    multiprocess_mode="livesum",
+)
+DB_CONNECTIONS = Counter(
+    "app_db_connections_total",
+    "Database connections opened, reused from the pool and closed",
+    ["event"],
+)
+DB_POOL_WAIT = Histogram(
+    "app_db_pool_wait_seconds",
+    "Time spent waiting for a free pooled database connection",
+    buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, float("inf")),
+)
+
+_memory_updated = 0.0
+
+
+def registry():
+    """The registry to expose: all workers' values in multiprocess mode."""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+
+    collector_registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collector_registry)
+    return collector_registry
+
+
+def mark_process_dead(pid=None):
+    """Drop the live gauge values of an exiting worker process."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+def observe_request(view, method, status, seconds, queries):
+    REQUESTS.labels(view, method, status).inc()
+    LATENCY.labels(view, method).observe(seconds)
+    QUERIES.labels(view, method).observe(queries)
+    _sync_token_cache()
+    _update_memory()
+
+
+def _sync_token_cache():
+    stats = token_cache.stats()
+    TOKEN_CACHE_LOOKUPS.labels("hit").set(stats["hits"])
+    TOKEN_CACHE_LOOKUPS.labels("miss").set(stats["misses"])
+    TOKEN_CACHE_SIZE.set(stats["size"])
+
+
+def _update_memory():
+    global _memory_updated
+    now = time.monotonic()
+    if now - _memory_updated < MEMORY_INTERVAL:
+        return
+    _memory_updated = now
+
+    resident = resident_memory()
+    if resident is not None:
+        MEMORY.set(resident)
+
+
+def resident_memory():
+    """Resident memory of this process in bytes, None if unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE")
@@ -0,0 +1,198 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from core import metrics, timing
+from core.db import routers
+
+logger = logging.getLogger("core.timing")
+
+
+class ServerTimingMiddleware:
+    """
+    Time a sample of requests: wall time, database time and queries,
+    serialization (core.timing.timed) and response rendering.
+
+    The timings are logged as one JSON line, tagged with the URL name of
+    the view: at WARNING level for requests slower than
+    SERVER_TIMING_SLOW_MS, at INFO for the rest. They are sent in a
+    Server-Timing header to staff users, or to everyone with
+    SERVER_TIMING_HEADER.
+
+    Place it first in MIDDLEWARE so the wall time covers the other
+    middleware. Streaming responses are timed until their first byte.
+    Queries run while serializing or rendering count in db time as well.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.SERVER_TIMING_SAMPLE_RATE
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+
+        timings = timing.Timings()
+        token = timing.current.set(timings)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timings.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            timing.current.reset(token)
+        timings.add("total", time.perf_counter() - start)
+
+        match = getattr(request, "resolver_match", None)
+        view = match.url_name if match else None
+        if self._send_header(request):
+            response["Server-Timing"] = self._header(timings, view)
+        self._log(request, response, timings, view)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called last, just before the handler renders the response
+        timings = timing.current.get()
+        if timings is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                timings.add("render", time.perf_counter() - start)
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def _send_header(self, request):
+        if settings.SERVER_TIMING_HEADER:
+            return True
+        # Set by authentication, also for DRF views
+        user = getattr(request, "user", None)
+        return user is not None and user.is_staff
+
+    def _header(self, timings, view):
+        durations = dict(timings.durations)
+        metrics = [
+            f"total;dur={durations.pop('total') * 1000:.2f}",
+            f"db;dur={durations.pop('db', 0) * 1000:.2f};"
+            f'desc="{timings.queries} queries"',
+        ]
+        metrics.extend(
+            f"{name};dur={seconds * 1000:.2f}"
+            for name, seconds in durations.items()
+        )
+        if view:
+            metrics.append(f'view;desc="{view}"')
+        return ", ".join(metrics)
+
+    def _log(self, request, response, timings, view):
+        total = timings.durations["total"] * 1000
+        level = (
+            logging.WARNING
+            if total >= settings.SERVER_TIMING_SLOW_MS
+            else logging.INFO
+        )
+        if not logger.isEnabledFor(level):
+            return
+
+        line = {
+            "view": view,
+            "method": request.method,
+            "status": response.status_code,
+            "queries": timings.queries,
+        }
+        line.update(
+            (f"{name}_ms", round(seconds * 1000, 2))
+            for name, seconds in timings.durations.items()
+        )
+        logger.log(level, json.dumps(line))
+
+
+class MetricsMiddleware:
+    """
+    Count every request and observe its latency and number of queries in
+    the Prometheus metrics of core.metrics, labelled with the namespaced
+    URL name of the view ("unmatched" when no URL matched).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count))
+            response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        metrics.observe_request(
+            match.view_name if match else "unmatched",
+            request.method,
+            response.status_code,
+            time.perf_counter() - start,
+            queries[0],
+        )
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Make the request available to core.db.routers.PrimaryReplicaRouter,
+    and pin users to the primary database after unsafe requests.
+
+    Streaming responses, such as the recipe export, keep routing their
+    reads while the server iterates their content.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = routers.RequestState(request)
+        token = routers.request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.request_state.reset(token)
+
+        if response.streaming:
+            response.streaming_content = self._routed(
+                state, response.streaming_content
+            )
+
+        # Also after failed requests, which may have written some rows
+        user = getattr(request, "user", None)
+        if (
+            request.method not in routers.SAFE_METHODS
+            and user is not None
+            and user.is_authenticated
+        ):
+            routers.pin(user.pk)
+        return response
+
+    def _routed(self, state, content):
+        """content, produced with the request's routing state set."""
+        content = iter(content)
+        while True:
+            token = routers.request_state.set(state)
+            try:
+                chunk = next(content)
+            except StopIteration:
+                return
+            finally:
+                routers.request_state.reset(token)
+            yield chunk
@@ -0,0 +1,72 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:42
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """
+    Merge tags/ingredients a user has more than once into the oldest one,
+    so the (user, name) unique constraints can be added.
+    """
+    Recipe = apps.get_model('core', 'Recipe')
+
+    for model_name, field in (('Tag', 'tags'), ('Ingredient', 'ingredients')):
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, field).through
+        column = f'{model_name.lower()}_id'
+
+        duplicates = (
+            model.objects.values('user_id', 'name')
+            .annotate(keep_id=Min('id'), total=Count('id'))
+            .filter(total__gt=1)
+        )
+        for duplicate in duplicates:
+            keep_id = duplicate['keep_id']
+            merge_ids = list(
+                model.objects.filter(
+                    user_id=duplicate['user_id'], name=duplicate['name']
+                )
+                .exclude(id=keep_id)
+                .values_list('id', flat=True)
+            )
+            for merge_id in merge_ids:
+                linked = through.objects.filter(**{column: keep_id}).values(
+                    'recipe_id'
+                )
+                # Drop links that would become duplicates, move the rest
+                through.objects.filter(
+                    recipe_id__in=linked, **{column: merge_id}
+                ).delete()
+                through.objects.filter(**{column: merge_id}).update(
+                    **{column: keep_id}
+                )
+            model.objects.filter(id__in=merge_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_ingredient_name_per_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_tag_name_per_user'),
+        ),
+        # The unique constraints' indexes serve the per-user listing too
+        migrations.RemoveIndex(
+            model_name='ingredient',
+            name='ingredient_user_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='tag',
+            name='tag_user_name_idx',
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:55
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from core.migrations._utils import run_on_postgresql
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce({row}.title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce({row}.description, '')), 'B')"
+)
+
+CREATE_SEARCH_SQL = [
+    f"""
+    CREATE FUNCTION core_recipe_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {SEARCH_VECTOR.format(row='NEW')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER core_recipe_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON core_recipe
+    FOR EACH ROW EXECUTE FUNCTION core_recipe_search_vector_update()
+    """,
+    f"UPDATE core_recipe SET search_vector = {SEARCH_VECTOR.format(row='core_recipe')}",
+    "CREATE INDEX recipe_search_vector_idx ON core_recipe USING gin (search_vector)",
+]
+
+DROP_SEARCH_SQL = [
+    "DROP INDEX recipe_search_vector_idx",
+    "DROP TRIGGER core_recipe_search_vector_trigger ON core_recipe",
+    "DROP FUNCTION core_recipe_search_vector_update()",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            run_on_postgresql(CREATE_SEARCH_SQL),
+            run_on_postgresql(DROP_SEARCH_SQL),
+        ),
+    ]
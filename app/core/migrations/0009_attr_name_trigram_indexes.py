@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:12
+
+from django.db import migrations
+
+from core.migrations._utils import run_on_postgresql
+
+CREATE_TRIGRAM_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX tag_name_trgm_idx ON core_tag USING gin (name gin_trgm_ops)",
+    "CREATE INDEX ingredient_name_trgm_idx ON core_ingredient USING gin (name gin_trgm_ops)",
+]
+
+DROP_TRIGRAM_SQL = [
+    "DROP INDEX tag_name_trgm_idx",
+    "DROP INDEX ingredient_name_trgm_idx",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(CREATE_TRIGRAM_SQL),
+            run_on_postgresql(DROP_TRIGRAM_SQL),
+        ),
+    ]
@@ -0,0 +1,13 @@
+# Helpers shared by migrations. The migration loader skips modules whose
+# name starts with an underscore.
+
+
+def run_on_postgresql(statements):
+    # Other databases search and autocomplete with the LIKE fallbacks in
+    # recipe.filters
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            for sql in statements:
+                schema_editor.execute(sql)
+
+    return run
@@ -2,6 +2,7 @@
 
 import uuid
 import os
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.conf import settings
 from django.contrib.auth.models import (
@@ -71,6 +72,20 @@ class Recipe(models.Model):
     tags = models.ManyToManyField("Tag")
     ingredients = models.ManyToManyField("Ingredient")
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Weighted title + description, kept up to date by a database trigger
+    # on PostgreSQL (see migration 0008). Always NULL on other databases.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Every recipe query filters by user and pages by -id
+            models.Index(fields=["user", "-id"], name="recipe_user_id_idx"),
+            # ETag validators read the latest update of a user's recipes
+            models.Index(
+                fields=["user", "updated_at"], name="recipe_user_updated_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -81,6 +96,15 @@ class Tag(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Also serves the per-user listing ordered by -name
+            models.UniqueConstraint(
+                fields=["user", "name"], name="unique_tag_name_per_user"
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -91,6 +115,15 @@ class Ingredient(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Also serves the per-user listing ordered by -name
+            models.UniqueConstraint(
+                fields=["user", "name"], name="unique_ingredient_name_per_user"
+            ),
+        ]
 
     def __str__(self):
         return self.name
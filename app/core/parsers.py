@@ -0,0 +1,33 @@
+# JSON parsing with orjson, when it's installed. See core.renderers.
+import codecs
+import io
+import re
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from core.renderers import FastJSONRenderer, orjson
+
+# orjson reads integers wider than 64 bits as floats, the stdlib exactly
+LONG_NUMBER = re.compile(rb"[0-9]{20,}")
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        if orjson is None or codecs.lookup(encoding).name != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        if LONG_NUMBER.search(body):
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # Reported by the stdlib parser, with its error messages
+            return super().parse(io.BytesIO(body), media_type, parser_context)
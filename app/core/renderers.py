@@ -0,0 +1,64 @@
+# JSON rendering with orjson, when it's installed.
+#
+# FastJSONRenderer produces the same bytes as DRF's JSONRenderer: values
+# orjson doesn't handle itself (Decimal, datetimes, lazy strings, ...)
+# go through DRF's JSONEncoder.default, and anything orjson can't render
+# at all falls back to the stdlib renderer.
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+
+        # orjson only writes compact, non-ASCII-escaped JSON
+        if (
+            orjson is None
+            or data is None
+            or indent is not None
+            or not self.compact
+            or self.ensure_ascii
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=ORJSON_OPTIONS,
+            )
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escaped like JSONRenderer does, so the output is valid JavaScript
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """Newline-delimited JSON: one line per item of a list."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        items = data if isinstance(data, list) else [data]
+        return b"".join(
+            super(NDJSONRenderer, self).render(item, None, renderer_context)
+            + b"\n"
+            for item in items
+        )
@@ -0,0 +1,19 @@
+# Signal handlers keeping the token authentication cache consistent
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.authentication import invalidate_token, invalidate_user
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def evict_changed_user(sender, instance, created, **kwargs):
+    # Deactivation, but also any other change to the cached user object
+    if not created:
+        invalidate_user(instance)
@@ -0,0 +1,44 @@
+# Test helpers shared by the API test suites
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+# Only issued because TestCase wraps each test in a transaction. In
+# production transaction.atomic issues BEGIN/COMMIT, which aren't logged.
+SAVEPOINT_PREFIXES = (
+    "SAVEPOINT",
+    "RELEASE SAVEPOINT",
+    "ROLLBACK TO SAVEPOINT",
+)
+
+
+class QueryBudgetMixin:
+    """
+    Adds assertQueryBudget to a TestCase.
+
+    Unlike assertNumQueries, the budget is an upper bound, so an endpoint
+    can get cheaper without breaking its test. Run the same budget against
+    1, 10 and 1000 rows to prove the query count doesn't grow with the
+    result size. Savepoint statements don't count towards the budget.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget, using=DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+
+        captured = [
+            query
+            for query in context.captured_queries
+            if not query["sql"].startswith(SAVEPOINT_PREFIXES)
+        ]
+        executed = len(captured)
+        if executed > budget:
+            queries = "\n".join(
+                f"{index}. {query['sql']}"
+                for index, query in enumerate(captured, 1)
+            )
+            self.fail(
+                f"{executed} queries executed, budget is {budget}\n{queries}"
+            )
@@ -0,0 +1,164 @@
+# Tests for the cached token authentication backend
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from core.authentication import (
+    CachedTokenAuthentication,
+    TokenCache,
+    token_cache,
+)
+
+ME_URL = reverse("user:me")
+
+
+class TokenCacheTests(TestCase):
+    def test_least_recently_used_evicted(self):
+        cache = TokenCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    @patch("core.authentication.time.monotonic")
+    def test_entries_expire(self, patched_monotonic):
+        cache = TokenCache(maxsize=2, ttl=60)
+        patched_monotonic.return_value = 100
+        cache.set("a", 1)
+
+        patched_monotonic.return_value = 159
+        self.assertEqual(cache.get("a"), 1)
+        patched_monotonic.return_value = 161
+        self.assertIsNone(cache.get("a"))
+
+    def test_stats(self):
+        cache = TokenCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_ratio"], 0.5)
+        self.assertEqual(stats["size"], 1)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_second_lookup_served_from_cache(self):
+        auth = CachedTokenAuthentication()
+        with self.assertNumQueries(1):
+            auth.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(0):
+            user, token = auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(token, self.token)
+        self.assertEqual(CachedTokenAuthentication.cache_stats()["hits"], 1)
+
+    def test_requests_get_their_own_user(self):
+        auth = CachedTokenAuthentication()
+        first, _ = auth.authenticate_credentials(self.token.key)
+        first.name = "Changed in one request"
+
+        second, token = auth.authenticate_credentials(self.token.key)
+
+        self.assertIsNot(second, first)
+        self.assertEqual(second.name, self.user.name)
+        self.assertEqual(token.user, second)
+
+    def test_password_hash_not_cached(self):
+        auth = CachedTokenAuthentication()
+        auth.authenticate_credentials(self.token.key)
+
+        entry = token_cache.get(self.token.key)
+        self.assertNotIn("password", entry["user"])
+        self.assertNotIn(self.user.password, repr(entry))
+
+    def test_update_through_cached_user(self):
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {"name": "New name"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # Saving the user doesn't touch the password it was built without
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("testpass123"))
+
+        res = self.client.patch(ME_URL, {"password": "newpass123"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, "New name")
+        self.assertTrue(self.user.check_password("newpass123"))
+
+    def test_invalid_token_not_cached(self):
+        auth = CachedTokenAuthentication()
+        for _ in range(2):
+            with self.assertRaises(AuthenticationFailed):
+                auth.authenticate_credentials("invalid")
+
+        self.assertEqual(token_cache.stats()["size"], 0)
+
+    def test_deleted_token_rejected(self):
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+            }
+        },
+        TOKEN_AUTH_SHARED_CACHE="default",
+    )
+    def test_shared_cache_tier(self):
+        self.addCleanup(caches["default"].clear)
+        auth = CachedTokenAuthentication()
+        auth.authenticate_credentials(self.token.key)
+        # Another process starts with an empty local cache
+        token_cache.clear()
+
+        with self.assertNumQueries(0):
+            user, _ = auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user, self.user)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            auth.authenticate_credentials(self.token.key)
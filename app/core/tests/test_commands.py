@@ -1,8 +1,17 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import skipIf, skipUnless
 from unittest.mock import patch
 from psycopg2 import OperationalError as Psycopg2Error
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+from core.models import Recipe
 
 
 @patch("core.management.commands.wait_for_db.Command.check")
@@ -21,3 +30,163 @@ class CommandTests(SimpleTestCase):
         call_command("wait_for_db")
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=["default"])
+
+
+class IndexStatsCommandTests(TestCase):
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL only")
+    def test_index_stats_lists_composite_indexes(self):
+        out = StringIO()
+        call_command("index_stats", stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("recipe_user_id_idx", output)
+        self.assertIn("recipe_tags_tag_recipe_idx", output)
+
+    @skipIf(connection.vendor == "postgresql", "Not PostgreSQL only")
+    def test_index_stats_requires_postgresql(self):
+        with self.assertRaises(CommandError):
+            call_command("index_stats")
+
+
+class BenchRenderersCommandTests(SimpleTestCase):
+    def test_bench_renderers(self):
+        out = StringIO()
+        call_command("bench_renderers", rows=[1, 10], repeat=1, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("=== 10 rows", output)
+        self.assertEqual(output.count("orjson "), 2)
+
+
+class SeedBenchCommandTests(TestCase):
+    def _seed(self, prefix, seed=0):
+        call_command(
+            "seed_bench",
+            users=5,
+            recipes=200,
+            prefix=prefix,
+            seed=seed,
+            batch_size=50,
+            stdout=StringIO(),
+        )
+        return Recipe.objects.filter(user__email__startswith=prefix)
+
+    def _snapshot(self, recipes):
+        return [
+            (
+                recipe.title,
+                recipe.price,
+                recipe.description,
+                sorted(tag.name for tag in recipe.tags.all()),
+                sorted(item.name for item in recipe.ingredients.all()),
+            )
+            for recipe in recipes.order_by("id").prefetch_related(
+                "tags", "ingredients"
+            )
+        ]
+
+    def test_seed_bench_is_skewed(self):
+        recipes = self._seed("a")
+
+        self.assertEqual(recipes.count(), 200)
+        counts = [
+            recipes.filter(user__email=f"a{rank}@example.com").count()
+            for rank in range(5)
+        ]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertGreater(counts[0], 2 * counts[-1])
+        self.assertTrue(
+            Recipe.ingredients.through.objects.filter(
+                recipe__in=recipes
+            ).exists()
+        )
+
+    def test_seed_bench_is_deterministic(self):
+        first = self._snapshot(self._seed("a", seed=1))
+        second = self._snapshot(self._seed("b", seed=1))
+        other = self._snapshot(self._seed("c", seed=2))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+
+    def test_seed_bench_existing_prefix(self):
+        self._seed("a")
+
+        with self.assertRaises(CommandError):
+            self._seed("a")
+
+
+class BenchApiCommandTests(TestCase):
+    def setUp(self):
+        call_command(
+            "seed_bench", users=2, recipes=30, prefix="api", stdout=StringIO()
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "baseline.json")
+
+    def _bench(self, **options):
+        out = StringIO()
+        call_command(
+            "bench_api",
+            user="api0@example.com",
+            requests=3,
+            warmup=1,
+            stdout=out,
+            **options,
+        )
+        return out.getvalue()
+
+    def test_bench_api_saves_and_compares_baseline(self):
+        out = self._bench(save_baseline=self.path)
+        self.assertIn("recipe-create", out)
+        with open(self.path) as f:
+            baseline = json.load(f)
+        self.assertGreater(baseline["recipe-list"]["queries"], 0)
+        self.assertEqual(baseline["health-check"]["queries"], 0)
+
+        # Generous, only the query counts are compared meaningfully here
+        out = self._bench(baseline=self.path, threshold=10**6)
+        self.assertIn("No regressions", out)
+
+        # Rolled back, the benchmark doesn't leave recipes behind
+        self.assertFalse(
+            Recipe.objects.filter(title__startswith="Bench recipe").exists()
+        )
+
+    def test_bench_api_fails_on_regression(self):
+        self._bench(save_baseline=self.path, endpoints="recipe-list")
+        with open(self.path) as f:
+            baseline = json.load(f)
+        baseline["recipe-list"]["queries"] -= 1
+        with open(self.path, "w") as f:
+            json.dump(baseline, f)
+
+        with self.assertRaisesMessage(CommandError, "recipe-list"):
+            self._bench(
+                baseline=self.path, threshold=10**6, endpoints="recipe-list"
+            )
+
+    def test_bench_api_user_with_few_recipes(self):
+        user = get_user_model().objects.create_user(
+            email="few@example.com", password="testpass123"
+        )
+        for title in ("Soup", "Salad", "Stew"):
+            Recipe.objects.create(
+                user=user, title=title, time_minutes=5, price="2.00"
+            )
+
+        out = StringIO()
+        call_command(
+            "bench_api",
+            user=user.email,
+            requests=5,
+            warmup=0,
+            endpoints="recipe-detail,recipe-update",
+            stdout=out,
+        )
+        self.assertIn("recipe-update", out.getvalue())
+
+    def test_bench_api_unknown_user(self):
+        with self.assertRaisesMessage(CommandError, "seed_bench"):
+            call_command("bench_api", user="nobody@example.com")
@@ -0,0 +1,169 @@
+import threading
+from io import StringIO
+from unittest.mock import MagicMock, Mock, patch
+
+import psycopg2
+import psycopg2.extensions
+from django.core.management import call_command
+from django.db.backends.postgresql import base as django_base
+from django.test import SimpleTestCase
+
+from core.db.backends.postgresql import base
+from core.db.pool import ConnectionPool, PoolTimeout
+
+SETTINGS = {
+    "NAME": "recipes",
+    "USER": "",
+    "PASSWORD": "",
+    "HOST": "",
+    "PORT": "",
+    "OPTIONS": {},
+    "AUTOCOMMIT": True,
+    "ATOMIC_REQUESTS": False,
+    "TIME_ZONE": None,
+    "CONN_MAX_AGE": 0,
+}
+
+
+def fake_connection():
+    connection = MagicMock(closed=False, isolation_level=None)
+    connection.info.transaction_status = (
+        psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    )
+    connection.get_parameter_status.return_value = "UTC"
+    return connection
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def test_reuses_returned_connections(self):
+        pool = ConnectionPool(fake_connection, 2, 1)
+
+        first, waited, reused = pool.get()
+        self.assertFalse(reused)
+        self.assertTrue(pool.put(first))
+        again, waited, reused = pool.get()
+
+        self.assertIs(again, first)
+        self.assertTrue(reused)
+
+    def test_discards_closed_connections(self):
+        pool = ConnectionPool(fake_connection, 1, 1)
+        connection, *_ = pool.get()
+        connection.closed = True
+
+        self.assertFalse(pool.put(connection))
+        self.assertEqual(pool.idle(), 0)
+        self.assertIsNot(pool.get()[0], connection)
+
+    def test_waits_for_a_free_connection(self):
+        pool = ConnectionPool(fake_connection, 1, 5)
+        connection, *_ = pool.get()
+        threading.Timer(0.05, pool.put, [connection]).start()
+
+        again, waited, reused = pool.get()
+
+        self.assertIs(again, connection)
+        self.assertGreater(waited, 0.01)
+
+    def test_timeout(self):
+        pool = ConnectionPool(fake_connection, 1, 0.01)
+        pool.get()
+        with self.assertRaises(PoolTimeout):
+            pool.get()
+
+    def test_failed_connect_frees_its_slot(self):
+        connect = Mock(side_effect=[OSError, fake_connection()])
+        pool = ConnectionPool(connect, 1, 0.01)
+        with self.assertRaises(OSError):
+            pool.get()
+        self.assertFalse(pool.get()[2])
+
+
+# Without the connection_created receivers, which query the real database
+@patch("django.db.backends.base.base.connection_created", Mock())
+@patch.object(django_base.DatabaseWrapper, "get_new_connection")
+class DatabaseWrapperTests(SimpleTestCase):
+    def setUp(self):
+        base._pools.clear()
+        self.addCleanup(base._pools.clear)
+
+    def _wrapper(self, **settings):
+        return base.DatabaseWrapper({**SETTINGS, **settings}, alias="test")
+
+    def test_health_check_replaces_broken_connection(self, get_new_connection):
+        get_new_connection.side_effect = lambda params: fake_connection()
+        wrapper = self._wrapper(CONN_MAX_AGE=None, CONN_HEALTH_CHECKS=True)
+        wrapper.ensure_connection()
+        broken = wrapper.connection
+
+        # A new request: the connection is checked before it's used
+        wrapper.close_if_unusable_or_obsolete()
+        with patch.object(wrapper, "is_usable", return_value=False):
+            wrapper.cursor()
+            wrapper.cursor()
+
+        self.assertIsNot(wrapper.connection, broken)
+        broken.close.assert_called_once_with()
+        self.assertEqual(get_new_connection.call_count, 2)
+
+    def test_checked_once_per_request(self, get_new_connection):
+        get_new_connection.side_effect = lambda params: fake_connection()
+        wrapper = self._wrapper(CONN_MAX_AGE=None, CONN_HEALTH_CHECKS=True)
+        wrapper.ensure_connection()
+
+        wrapper.close_if_unusable_or_obsolete()
+        with patch.object(wrapper, "is_usable", return_value=True) as usable:
+            wrapper.cursor()
+            wrapper.cursor()
+
+        usable.assert_called_once_with()
+        self.assertEqual(get_new_connection.call_count, 1)
+
+    def test_pooled_connections_are_reused(self, get_new_connection):
+        get_new_connection.side_effect = lambda params: fake_connection()
+        wrapper = self._wrapper(POOL_SIZE=2, CONN_HEALTH_CHECKS=True)
+
+        wrapper.ensure_connection()
+        physical = wrapper.connection
+        wrapper.close()
+        physical.close.assert_not_called()
+
+        wrapper.ensure_connection()
+        self.assertIs(wrapper.connection, physical)
+        self.assertEqual(get_new_connection.call_count, 1)
+
+    def test_pooled_connection_rolled_back(self, get_new_connection):
+        get_new_connection.side_effect = lambda params: fake_connection()
+        wrapper = self._wrapper(POOL_SIZE=1)
+        wrapper.ensure_connection()
+        physical = wrapper.connection
+        physical.info.transaction_status = (
+            psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        )
+
+        wrapper.close()
+
+        physical.rollback.assert_called_once_with()
+        self.assertEqual(wrapper.pool.idle(), 1)
+
+    def test_dead_pooled_connection_is_replaced(self, get_new_connection):
+        get_new_connection.side_effect = lambda params: fake_connection()
+        wrapper = self._wrapper(POOL_SIZE=1, CONN_HEALTH_CHECKS=True)
+        wrapper.ensure_connection()
+        dead = wrapper.connection
+        wrapper.close()
+        dead.cursor.side_effect = psycopg2.OperationalError
+
+        wrapper.ensure_connection()
+
+        self.assertIsNot(wrapper.connection, dead)
+        dead.close.assert_called_once_with()
+
+
+class BenchConnectionsCommandTests(SimpleTestCase):
+    databases = ["default"]
+
+    def test_bench_connections(self):
+        out = StringIO()
+        call_command("bench_connections", requests=5, stdout=out)
+        self.assertIn("persistent", out.getvalue())
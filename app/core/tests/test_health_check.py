@@ -1,8 +1,17 @@
-from django.test import TestCase
+import os
+import tempfile
+from unittest.mock import Mock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from core import health
+
+READY_URL = reverse("health-ready")
+
 
 class HealthCheckTests(TestCase):
     def test_health_check(self):
@@ -10,3 +19,107 @@ class HealthCheckTests(TestCase):
         url = reverse("health-check")
         res = client.get(url)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_liveness(self):
+        res = APIClient().get(reverse("health-live"))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"alive": True})
+
+
+@override_settings(METRICS_TOKEN="scraper-secret")
+class ReadinessTests(TestCase):
+    def setUp(self):
+        # Shown the details of the checks
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer scraper-secret")
+        health.clear_cache()
+        self.addCleanup(health.clear_cache)
+
+    def test_ready(self):
+        res = self.client.get(READY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data["ready"])
+        self.assertFalse(res.data["cached"])
+        self.assertEqual(
+            set(res.data["checks"]),
+            {"database", "connections", "migrations", "media"},
+        )
+        for name, check in res.data["checks"].items():
+            with self.subTest(check=name):
+                self.assertTrue(check["ok"])
+                self.assertGreaterEqual(check["ms"], 0)
+        self.assertIn("latency_ms", res.data["checks"]["database"])
+
+    def test_results_are_cached(self):
+        self.client.get(READY_URL)
+        check_database = Mock(return_value={})
+        with patch.dict(health.CHECKS, database=check_database):
+            res = self.client.get(READY_URL)
+
+        self.assertTrue(res.data["cached"])
+        check_database.assert_not_called()
+
+    @override_settings(HEALTH_CHECK_CACHE_TTL=0)
+    def test_cache_expires(self):
+        self.client.get(READY_URL)
+        res = self.client.get(READY_URL)
+        self.assertFalse(res.data["cached"])
+
+    def test_details_hidden_from_the_public(self):
+        plan = [("core.0010_example", False)]
+        with patch.object(
+            health.MigrationExecutor, "migration_plan", return_value=plan
+        ), self.assertLogs("core.health", "WARNING") as logs:
+            res = APIClient().get(READY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res.data["checks"]["migrations"], {"ok": False})
+        self.assertEqual(res.data["checks"]["database"], {"ok": True})
+        self.assertIn("core.0010_example", logs.output[0])
+
+    def test_details_shown_to_staff(self):
+        staff = get_user_model().objects.create_user(
+            email="staff@example.com", password="testpass123", is_staff=True
+        )
+        client = APIClient()
+        client.force_authenticate(staff)
+
+        res = client.get(READY_URL)
+
+        self.assertIn("latency_ms", res.data["checks"]["database"])
+
+    def test_unwritable_media_root(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        missing = os.path.join(directory.name, "missing")
+        with override_settings(MEDIA_ROOT=missing), self.assertLogs(
+            "core.health", "WARNING"
+        ):
+            res = self.client.get(READY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(res.data["ready"])
+        self.assertFalse(res.data["checks"]["media"]["ok"])
+        self.assertIn("error", res.data["checks"]["media"])
+        self.assertTrue(res.data["checks"]["database"]["ok"])
+
+    @override_settings(HEALTH_DB_MAX_LATENCY_MS=-1)
+    def test_slow_database(self):
+        with self.assertLogs("core.health", "WARNING"):
+            res = self.client.get(READY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn("SELECT 1 took", res.data["checks"]["database"]["error"])
+
+    def test_unapplied_migrations(self):
+        plan = [("core.0010_example", False)]
+        with patch.object(
+            health.MigrationExecutor, "migration_plan", return_value=plan
+        ), self.assertLogs("core.health", "WARNING"):
+            res = self.client.get(READY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn(
+            "1 unapplied migrations", res.data["checks"]["migrations"]["error"]
+        )
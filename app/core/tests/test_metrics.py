@@ -0,0 +1,130 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY, CollectorRegistry
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.authentication import token_cache
+
+METRICS_URL = reverse("metrics")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.token = Token.objects.create(user=self.user).key
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token}")
+        token_cache.clear()
+
+    def test_requests_are_counted_by_view(self):
+        labels = {"view": "recipe:tag-list", "method": "GET"}
+        requests = sample("app_requests_total", status="200", **labels)
+        observed = sample("app_request_duration_seconds_count", **labels)
+        queries = sample("app_request_queries_sum", **labels)
+
+        self.client.get(TAGS_URL)
+        self.client.get(TAGS_URL)
+
+        self.assertEqual(
+            sample("app_requests_total", status="200", **labels),
+            requests + 2,
+        )
+        self.assertEqual(
+            sample("app_request_duration_seconds_count", **labels),
+            observed + 2,
+        )
+        self.assertGreater(
+            sample("app_request_queries_sum", **labels), queries
+        )
+
+    def test_unmatched_requests(self):
+        labels = {"view": "unmatched", "method": "GET", "status": "404"}
+        before = sample("app_requests_total", **labels)
+
+        self.client.get("/api/nothing-here")
+
+        self.assertEqual(sample("app_requests_total", **labels), before + 1)
+
+    def test_token_cache_lookups(self):
+        self.client.get(TAGS_URL)
+        self.client.get(TAGS_URL)
+
+        self.assertEqual(sample("app_token_cache_lookups", result="miss"), 1)
+        self.assertEqual(sample("app_token_cache_lookups", result="hit"), 1)
+        self.assertEqual(sample("app_token_cache_size"), 1)
+
+    @override_settings(METRICS_TOKEN="scraper-secret")
+    def test_metrics_endpoint(self):
+        self.client.get(TAGS_URL)
+
+        res = APIClient().get(
+            METRICS_URL, HTTP_AUTHORIZATION="Bearer scraper-secret"
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res["Content-Type"].startswith("text/plain"))
+        body = res.content.decode()
+        self.assertIn('app_requests_total{method="GET"', body)
+        self.assertIn("app_request_duration_seconds_bucket", body)
+        self.assertIn("app_process_resident_memory_bytes", body)
+
+    @override_settings(METRICS_TOKEN="scraper-secret")
+    def test_metrics_require_the_token(self):
+        for authorization in ("", "Bearer wrong", f"Token {self.token}"):
+            with self.subTest(authorization=authorization):
+                res = APIClient().get(
+                    METRICS_URL, HTTP_AUTHORIZATION=authorization
+                )
+                self.assertEqual(res.status_code, 401)
+                self.assertNotIn(b"app_requests_total", res.content)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_metrics_disabled_without_a_token(self):
+        res = APIClient().get(METRICS_URL, HTTP_AUTHORIZATION="Bearer ")
+        self.assertEqual(res.status_code, 404)
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    def test_single_process(self):
+        with patch.dict(os.environ):
+            os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+            self.assertIs(metrics.registry(), REGISTRY)
+
+    def test_multiprocess(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with patch.dict(
+            os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory.name}
+        ):
+            registry = metrics.registry()
+
+        self.assertIsInstance(registry, CollectorRegistry)
+        self.assertIsNot(registry, REGISTRY)
+
+    def test_mark_process_dead(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # A live gauge file of a worker that exits
+        path = os.path.join(directory.name, "gauge_livesum_4242.db")
+        open(path, "w").close()
+
+        with patch.dict(
+            os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory.name}
+        ):
+            metrics.mark_process_dead(4242)
+
+        self.assertFalse(os.path.exists(path))
@@ -0,0 +1,101 @@
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import middleware
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+def parse_server_timing(header):
+    """{name: {"dur": ..., "desc": ...}} of a Server-Timing header."""
+    metrics = {}
+    for metric in header.split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+class ServerTimingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        recipe = Recipe.objects.create(
+            user=self.user, title="Soup", time_minutes=10, price="5.00"
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name="Vegan"))
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_server_timing_header(self):
+        for fast in (True, False):
+            with self.subTest(fast=fast), override_settings(
+                RECIPE_FAST_LISTS=fast
+            ):
+                res = self.client.get(RECIPES_URL)
+
+                metrics = parse_server_timing(res["Server-Timing"])
+                self.assertEqual(
+                    list(metrics),
+                    ["total", "db", "serialize", "render", "view"],
+                )
+                self.assertEqual(metrics["view"]["desc"], '"recipe-list"')
+                self.assertRegex(
+                    metrics["db"]["desc"], r'^"[1-9]\d* queries"$'
+                )
+                self.assertGreaterEqual(
+                    float(metrics["total"]["dur"]),
+                    float(metrics["render"]["dur"]),
+                )
+
+    def test_structured_log_line(self):
+        with self.assertLogs("core.timing", "INFO") as logs:
+            self.client.get(TAGS_URL)
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["view"], "tag-list")
+        self.assertEqual(line["method"], "GET")
+        self.assertEqual(line["status"], 200)
+        self.assertGreater(line["queries"], 0)
+        for name in ("total_ms", "db_ms", "serialize_ms", "render_ms"):
+            self.assertIn(name, line)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_timed(self):
+        with patch.object(middleware.logger, "log") as log:
+            res = self.client.get(TAGS_URL)
+
+        self.assertNotIn("Server-Timing", res)
+        log.assert_not_called()
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_only_sent_to_staff(self):
+        with self.assertLogs("core.timing", "INFO"):
+            res = self.client.get(TAGS_URL)
+        self.assertNotIn("Server-Timing", res)
+
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.get(TAGS_URL)
+        self.assertIn("Server-Timing", res)
+
+    def test_fast_requests_log_at_info(self):
+        with self.assertLogs("core.timing", "INFO") as logs:
+            self.client.get(TAGS_URL)
+
+        self.assertEqual(logs.records[0].levelname, "INFO")
+
+    @override_settings(SERVER_TIMING_SLOW_MS=0)
+    def test_slow_requests_log_at_warning(self):
+        with self.assertLogs("core.timing", "WARNING") as logs:
+            self.client.get(TAGS_URL)
+
+        self.assertEqual(logs.records[0].levelname, "WARNING")
@@ -1,5 +1,6 @@
 # Tests for models
 from unittest.mock import patch
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from decimal import Decimal
@@ -66,6 +67,15 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(tag), tag.name)
 
+    def test_tag_name_unique_per_user(self):
+        user = create_user(email="test@example.com", password="test123")
+        other_user = create_user(email="other@example.com", password="test123")
+        models.Tag.objects.create(user=user, name="Tag1")
+        models.Tag.objects.create(user=other_user, name="Tag1")
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name="Tag1")
+
     def test_create_ingredient(self):
         user = create_user(email="text@example.com", password="test123")
         ingredient = models.Ingredient.objects.create(
@@ -0,0 +1,90 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer, orjson
+
+PAYLOAD = {
+    "id": 1,
+    "title": "Crème brûlée – “classic”  ",
+    "price": Decimal("5.50"),
+    "ratio": 0.1,
+    "created": datetime.datetime(
+        2024, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc
+    ),
+    "naive": datetime.datetime(2024, 1, 2, 3, 4, 5),
+    "date": datetime.date(2024, 1, 2),
+    "time": datetime.time(3, 4, 5, 678),
+    "duration": datetime.timedelta(minutes=90),
+    "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "lazy": gettext_lazy("This field is required."),
+    "tags": [{"id": 2, "name": "Vegan"}],
+    "set": {3},
+    "empty": [],
+    "none": None,
+    1: "int key",
+}
+
+
+@skipIf(orjson is None, "orjson isn't installed")
+class FastJSONRendererTests(SimpleTestCase):
+    def test_same_output_as_json_renderer(self):
+        for data in (PAYLOAD, [PAYLOAD] * 3, "text", 10**30, [], {}):
+            with self.subTest(data=data):
+                self.assertEqual(
+                    FastJSONRenderer().render(data),
+                    JSONRenderer().render(data),
+                )
+
+    def test_none_renders_empty(self):
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+    def test_indent_falls_back_to_json_renderer(self):
+        media_type = "application/json; indent=4"
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD, media_type),
+            JSONRenderer().render(PAYLOAD, media_type),
+        )
+
+    def test_without_orjson(self):
+        with patch("core.renderers.orjson", None):
+            self.assertEqual(
+                FastJSONRenderer().render(PAYLOAD),
+                JSONRenderer().render(PAYLOAD),
+            )
+
+
+class FastJSONParserTests(SimpleTestCase):
+    def _parse(self, parser, body):
+        return parser.parse(io.BytesIO(body), "application/json", {})
+
+    def test_same_result_as_json_parser(self):
+        body = JSONRenderer().render({**PAYLOAD, "big": 10**30})
+        self.assertEqual(
+            self._parse(FastJSONParser(), body),
+            self._parse(JSONParser(), body),
+        )
+
+    def test_invalid_json(self):
+        for body in (b"{", b"[NaN]", b"\xff"):
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError):
+                    self._parse(FastJSONParser(), body)
+
+    def test_without_orjson(self):
+        with patch("core.parsers.orjson", None):
+            self.assertEqual(
+                self._parse(FastJSONParser(), b'{"price": "5.50"}'),
+                {"price": "5.50"},
+            )
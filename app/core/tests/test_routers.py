@@ -0,0 +1,198 @@
+import json
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import checks
+from core.db import routers
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+EXPORT_URL = reverse("recipe:recipe-export")
+
+
+def create_recipe(user, using="default", **params):
+    defaults = {"title": "Soup", "time_minutes": 10, "price": "5.00"}
+    defaults.update(params)
+    return Recipe.objects.using(using).create(user_id=user.pk, **defaults)
+
+
+def titles(res):
+    return [recipe["title"] for recipe in res.data["results"]]
+
+
+class SharedPinCacheMixin:
+    """Pins in a cache that worker processes share, here on disk."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        caches = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+                },
+                "pins": {
+                    "BACKEND": (
+                        "django.core.cache.backends.filebased.FileBasedCache"
+                    ),
+                    "LOCATION": directory.name,
+                },
+            },
+            DATABASE_REPLICA_PIN_CACHE="pins",
+        )
+        caches.enable()
+        self.addCleanup(caches.disable)
+        super().setUp()
+
+
+# replica1 is a second, separate test database standing in for a replica
+# that hasn't caught up with the primary
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class PrimaryReplicaRoutingTests(SharedPinCacheMixin, TestCase):
+    databases = {"default", "replica1"}
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+        # Replicated before the recipes diverged
+        get_user_model()(pk=self.user.pk, email=self.user.email).save(
+            using="replica1"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        create_recipe(self.user, title="On the primary")
+        create_recipe(self.user, using="replica1", title="On the replica")
+
+    def test_reads_go_to_the_replica(self):
+        with CaptureQueriesContext(connections["replica1"]) as replica:
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(titles(res), ["On the replica"])
+        self.assertGreater(len(replica), 0)
+
+    def test_validators_follow_the_replica(self):
+        etag = self.client.get(RECIPES_URL)["ETag"]
+
+        # The replica hasn't seen the new recipe yet
+        create_recipe(self.user, title="Also on the primary")
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+        # It has now
+        create_recipe(self.user, using="replica1", title="Caught up")
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("Caught up", titles(res))
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_streamed_export_reads_from_the_replica(self):
+        res = self.client.get(EXPORT_URL)
+
+        # Rows are read while the response is consumed
+        with CaptureQueriesContext(connections["replica1"]) as replica:
+            lines = b"".join(res.streaming_content).splitlines()
+
+        self.assertEqual(
+            [json.loads(line)["title"] for line in lines], ["On the replica"]
+        )
+        self.assertGreater(len(replica), 0)
+
+    def test_writer_reads_from_the_primary(self):
+        payload = {"title": "New", "time_minutes": 5, "price": "1.00"}
+        self.client.post(RECIPES_URL, payload, format="json")
+
+        with CaptureQueriesContext(connections["replica1"]) as replica:
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(titles(res), ["New", "On the primary"])
+        self.assertEqual(len(replica), 0)
+
+    def test_pin_expires(self):
+        self.client.post(TAGS_URL, {"name": "Vegan"}, format="json")
+        self.assertTrue(routers.is_pinned(self.user.pk))
+
+        routers.pin_cache().clear()
+
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(titles(res), ["On the replica"])
+
+    def test_other_users_are_not_pinned(self):
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="testpass123"
+        )
+        routers.pin(other.pk)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(titles(res), ["On the replica"])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(titles(res), ["On the primary"])
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class PrimaryReplicaRouterTests(SharedPinCacheMixin, TestCase):
+    databases = {"default", "replica1"}
+
+    def setUp(self):
+        super().setUp()
+        self.router = routers.PrimaryReplicaRouter()
+
+    def _in_request(self, method):
+        request = type("Request", (), {"method": method, "user": None})()
+        token = routers.request_state.set(routers.RequestState(request))
+        self.addCleanup(routers.request_state.reset, token)
+
+    def test_outside_requests(self):
+        self.assertEqual(self.router.db_for_read(Recipe), "default")
+
+    def test_safe_requests(self):
+        self._in_request("GET")
+        self.assertEqual(self.router.db_for_read(Recipe), "replica1")
+        self.assertEqual(self.router.db_for_read(Tag), "replica1")
+        self.assertEqual(
+            self.router.db_for_read(Recipe.tags.through), "replica1"
+        )
+        self.assertEqual(self.router.db_for_read(get_user_model()), "default")
+
+    def test_unsafe_requests(self):
+        self._in_request("POST")
+        self.assertEqual(self.router.db_for_read(Recipe), "default")
+
+    def test_transactions_read_from_the_primary(self):
+        self._in_request("GET")
+        with transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Recipe), "default")
+
+    def test_writes(self):
+        self._in_request("GET")
+        self.assertEqual(self.router.db_for_write(Recipe), "default")
+
+    @override_settings(DATABASE_REPLICA_PIN_CACHE="default")
+    def test_local_pin_cache_reads_from_the_primary(self):
+        self._in_request("GET")
+        self.assertEqual(self.router.db_for_read(Recipe), "default")
+
+
+class ReplicaPinCacheCheckTests(SimpleTestCase):
+    @override_settings(
+        DATABASE_REPLICAS=["replica1"], DATABASE_REPLICA_PIN_CACHE="default"
+    )
+    def test_local_pin_cache(self):
+        errors = checks.check_replica_pin_cache(None)
+        self.assertEqual([error.id for error in errors], ["core.E001"])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertEqual(checks.check_replica_pin_cache(None), [])
@@ -0,0 +1,57 @@
+# Per-request timings, collected by core.middleware.ServerTimingMiddleware
+import contextvars
+import time
+from contextlib import contextmanager
+
+from rest_framework import serializers
+
+# Timings of the current request, None when it isn't sampled
+current = contextvars.ContextVar("timings", default=None)
+
+
+class Timings:
+    """Durations in seconds by name, plus the number of queries run."""
+
+    def __init__(self):
+        self.durations = {}
+        self.queries = 0
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0) + seconds
+
+    def execute(self, execute, sql, params, many, context):
+        """A database execute wrapper timing every query."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add("db", time.perf_counter() - start)
+            self.queries += 1
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to the current request's timings."""
+    timings = current.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+class TimedDataMixin:
+    """Count building a serializer's data as serialize time."""
+
+    @property
+    def data(self):
+        with timed("serialize"):
+            return super().data
+
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    """list_serializer_class of serializers using TimedDataMixin."""
@@ -1,7 +1,73 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from core import health
+from core.metrics import registry
+
 
 @api_view(["GET"])
 def health_check(request):
     return Response({"healthy": True})
+
+
+@api_view(["GET"])
+def liveness(request):
+    """The process serves requests; checks no dependencies."""
+    return Response({"alive": True})
+
+
+def has_metrics_token(request):
+    """Whether the request presents METRICS_TOKEN as a bearer token."""
+    if not settings.METRICS_TOKEN:
+        return False
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    presented = request.META.get("HTTP_AUTHORIZATION", "")
+    return hmac.compare_digest(presented.encode(), expected.encode())
+
+
+@api_view(["GET"])
+def readiness(request):
+    """
+    Whether the dependencies work, 503 when any check fails.
+
+    Errors, timings and figures such as connection counts are only shown
+    to staff users and scrapers holding METRICS_TOKEN; everyone else
+    sees which checks passed. Failures are logged either way.
+    """
+    checks, cached = health.run_checks()
+    ready = all(check["ok"] for check in checks.values())
+    if not (request.user.is_staff or has_metrics_token(request)):
+        checks = {name: {"ok": check["ok"]} for name, check in checks.items()}
+    return Response(
+        {"ready": ready, "cached": cached, "checks": checks},
+        status=(
+            status.HTTP_200_OK
+            if ready
+            else status.HTTP_503_SERVICE_UNAVAILABLE
+        ),
+    )
+
+
+def metrics(request):
+    """
+    Prometheus metrics of all workers, in the text format.
+
+    Per-view traffic and process figures aren't public: a 404 unless
+    METRICS_TOKEN is set, a 401 unless the request presents it.
+    """
+    if not settings.METRICS_TOKEN:
+        raise Http404
+    if not has_metrics_token(request):
+        response = HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+        response["WWW-Authenticate"] = 'Bearer realm="metrics"'
+        return response
+
+    return HttpResponse(
+        generate_latest(registry()), content_type=CONTENT_TYPE_LATEST
+    )
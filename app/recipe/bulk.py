@@ -0,0 +1,166 @@
+# Set-based helpers for writing recipes and their tags/ingredients
+import csv
+import io
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.cache import bump_version
+
+
+def get_or_create_by_name(model, user, names):
+    """
+    Return model objects for names, creating the missing ones.
+
+    Costs one SELECT of the existing names and, if some are missing, one
+    bulk INSERT plus one SELECT to read back their IDs. Concurrent
+    creates of the same name are resolved by the (user, name) unique
+    constraint: the losing INSERT is skipped and the winner is read back.
+    Objects are returned in the order of names, without duplicates.
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return []
+
+    found = {
+        obj.name: obj
+        for obj in model.objects.filter(user=user, name__in=names)
+    }
+    missing = [name for name in names if name not in found]
+
+    if missing:
+        model.objects.bulk_create(
+            [model(user=user, name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        # bulk_create sends no post_save signals
+        bump_version(user.pk)
+        found.update(
+            (obj.name, obj)
+            for obj in model.objects.filter(user=user, name__in=missing)
+        )
+
+    return [found[name] for name in names]
+
+
+def insert_recipes(recipes):
+    """
+    INSERT recipes in one statement and set their primary keys.
+
+    Backends that can't return IDs from a bulk INSERT (SQLite on this
+    Django version) fall back to one INSERT per recipe.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return Recipe.objects.bulk_create(recipes)
+
+    for recipe in recipes:
+        recipe.save(force_insert=True)
+    return recipes
+
+
+def bulk_create_recipes(user, items):
+    """
+    Create recipes from validated RecipeSerializer data.
+
+    Tag and ingredient names of all items are resolved together, the
+    recipes are inserted in one statement and the links of each through
+    table in one more. Returns the recipes in the order of items.
+    """
+    items = [dict(item) for item in items]
+    tag_lists = [item.pop("tags", []) for item in items]
+    ingredient_lists = [item.pop("ingredients", []) for item in items]
+
+    recipes = insert_recipes([Recipe(user=user, **item) for item in items])
+
+    _link(
+        Recipe.tags.through,
+        "tag_id",
+        recipes,
+        tag_lists,
+        get_or_create_by_name(Tag, user, _names(tag_lists)),
+    )
+    _link(
+        Recipe.ingredients.through,
+        "ingredient_id",
+        recipes,
+        ingredient_lists,
+        get_or_create_by_name(Ingredient, user, _names(ingredient_lists)),
+    )
+    # Neither bulk_create sends post_save or m2m_changed signals
+    bump_version(user.pk)
+    return recipes
+
+
+def _names(lists):
+    return [item["name"] for items in lists for item in items]
+
+
+def _link(through, column, recipes, lists, objs):
+    ids = {obj.name: obj.pk for obj in objs}
+    through.objects.bulk_create(
+        through(recipe_id=recipe.pk, **{column: related_id})
+        for recipe, items in zip(recipes, lists)
+        for related_id in dict.fromkeys(ids[item["name"]] for item in items)
+    )
+
+
+def reserve_ids(model, count):
+    """
+    Take count primary keys from the model's sequence (PostgreSQL), so
+    rows can be COPYed together with rows referencing them.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, %s)) "
+            "FROM generate_series(1, %s)",
+            [model._meta.db_table, model._meta.pk.column, count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def copy_rows(model, fields, rows):
+    """
+    Load rows of values for fields into the model's table with COPY
+    (PostgreSQL). Bypasses save() and signals like bulk_create does.
+    """
+    buffer = io.StringIO()
+    # Quoting every value keeps empty strings apart from NULLs
+    csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(rows)
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    columns = ", ".join(
+        quote(model._meta.get_field(name).column) for name in fields
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {quote(model._meta.db_table)} ({columns}) "
+            "FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+
+
+def insert_rows(model, fields, rows):
+    """
+    Portable counterpart of copy_rows: one multi-row executemany INSERT,
+    without instantiating models.
+    """
+    fields = [model._meta.get_field(name) for name in fields]
+    # The connection itself, not the thread-local proxy: it's passed to
+    # every get_db_prep_save() call
+    db = connections[DEFAULT_DB_ALIAS]
+    quote = db.ops.quote_name
+    columns = ", ".join(quote(field.column) for field in fields)
+    placeholders = ", ".join(["%s"] * len(fields))
+    with db.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote(model._meta.db_table)} ({columns}) "
+            f"VALUES ({placeholders})",
+            [
+                [
+                    field.get_db_prep_save(value, db)
+                    for field, value in zip(fields, row)
+                ]
+                for row in rows
+            ],
+        )
@@ -0,0 +1,111 @@
+# Per-user versioned cache of list responses.
+#
+# Every cached response is keyed on the user's current version number.
+# A write bumps the version (see recipe.signals), which makes all of the
+# user's cached responses unreachable at once. They then age out of the
+# cache on their own.
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def response_cache():
+    return caches[settings.RECIPE_RESPONSE_CACHE_ALIAS]
+
+
+def _version_key(user_id):
+    return f"recipe-cache-version:{user_id}"
+
+
+def get_version(user_id):
+    cache = response_cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        # Start from the clock rather than 0 so a version key that was
+        # evicted can't come back as a version that is still cached.
+        cache.add(_version_key(user_id), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def _bump(user_id):
+    cache = response_cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.add(_version_key(user_id), time.time_ns(), timeout=None)
+
+
+def bump_version(user_id):
+    """
+    Invalidate every cached response of the user.
+
+    Bumps now and again once the transaction commits, so a response read
+    from the database before the commit can't stay cached afterwards.
+    Also bumps while the cache is switched off, so switching it back on
+    can't serve responses cached before the switch.
+    """
+    _bump(user_id)
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+def cache_key(request, view_name):
+    params = sorted(
+        (key, sorted(values)) for key, values in request.query_params.lists()
+    )
+    digest = hashlib.sha256(
+        f"{request.get_host()}{request.path}{params}".encode()
+    ).hexdigest()
+    user_id = request.user.pk
+    return (
+        f"recipe-cache:{user_id}:{get_version(user_id)}:{view_name}:{digest}"
+    )
+
+
+def _count(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def cache_stats():
+    with _stats_lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "hit_ratio": _stats["hits"] / lookups if lookups else 0.0,
+        }
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.update(hits=0, misses=0)
+
+
+class CachedListMixin:
+    """Serve list responses from the per-user response cache."""
+
+    def list(self, request, *args, **kwargs):
+        if not settings.RECIPE_RESPONSE_CACHE_ENABLED:
+            return super().list(request, *args, **kwargs)
+
+        key = cache_key(request, f"{self.basename}-list")
+        data = response_cache().get(key)
+        if data is not None:
+            _count("hits")
+            return Response(data)
+
+        _count("misses")
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            response_cache().set(
+                key, response.data, settings.RECIPE_RESPONSE_CACHE_TIMEOUT
+            )
+        return response
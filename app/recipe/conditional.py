@@ -0,0 +1,164 @@
+# Conditional GET support (ETag / Last-Modified) for the recipe API.
+#
+# Validators are derived from a cheap aggregate query over the rows a
+# response depends on (row counts and the latest updated_at), so a
+# 304 Not Modified is answered without loading or serializing anything.
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.db import router
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.models import Ingredient, Recipe, Tag
+
+
+def _aggregate(queryset, group_by, function):
+    """Scalar subquery applying function to the rows of queryset."""
+    return Subquery(
+        queryset.order_by()
+        .values(group_by)
+        .annotate(value=function)
+        .values("value")
+    )
+
+
+def user_state(user):
+    """
+    Counts and latest updates of the user's recipes, tags and ingredients.
+
+    Anything that changes one of the list responses changes one of these.
+    Read from the database the lists are read from, so a replica that
+    hasn't caught up yet doesn't give its stale lists the validators of
+    the primary's.
+    """
+    aggregates = {}
+    for model in (Recipe, Tag, Ingredient):
+        rows = model.objects.filter(user=OuterRef("pk"))
+        name = model._meta.model_name
+        aggregates[f"{name}_count"] = _aggregate(rows, "user", Count("id"))
+        aggregates[f"{name}_updated"] = _aggregate(
+            rows, "user", Max("updated_at")
+        )
+
+    return (
+        get_user_model()
+        .objects.using(router.db_for_read(Recipe))
+        .filter(pk=user.pk)
+        .annotate(**aggregates)
+        .values_list(*aggregates)
+        .first()
+    )
+
+
+def recipe_state(user, pk):
+    """
+    Latest update of a recipe and of its tags and ingredients, or None
+    if the user has no such recipe.
+    """
+    aggregates = {}
+    for model in (Tag, Ingredient):
+        rows = model.objects.filter(recipe=OuterRef("pk"))
+        name = model._meta.model_name
+        aggregates[f"{name}_count"] = _aggregate(rows, "recipe", Count("id"))
+        aggregates[f"{name}_updated"] = _aggregate(
+            rows, "recipe", Max("updated_at")
+        )
+
+    return (
+        Recipe.objects.filter(user=user, pk=pk)
+        .annotate(**aggregates)
+        .values_list("updated_at", *aggregates)
+        .first()
+    )
+
+
+def _last_modified(state):
+    timestamps = [value for value in state if hasattr(value, "timestamp")]
+    return max(timestamps).timestamp() if timestamps else None
+
+
+class ConditionalMixin:
+    def _conditional(self, state, handler):
+        """
+        Answer 304 if the client's copy is current, otherwise run handler
+        and add the validators to its response.
+
+        If-Modified-Since is not honoured: a list shrinking by one row,
+        or a recipe losing a tag or ingredient that was deleted, doesn't
+        move the latest update. Clients revalidate with If-None-Match.
+        """
+        request = self.request
+        if state is None:
+            return handler()
+
+        digest = hashlib.sha256(
+            repr(
+                (
+                    self.basename,
+                    self.action,
+                    request.get_host(),
+                    request.get_full_path(),
+                    request.accepted_media_type,
+                    state,
+                )
+            ).encode()
+        ).hexdigest()
+        etag = f'"{digest}"'
+        last_modified = _last_modified(state)
+
+        headers = {"ETag": etag}
+        if last_modified is not None:
+            headers["Last-Modified"] = http_date(last_modified)
+
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        not_modified = False
+        if if_none_match is not None:
+            etags = parse_etags(if_none_match)
+            not_modified = "*" in etags or etag in etags
+
+        if not_modified:
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+
+        response = handler()
+        if response.status_code == status.HTTP_200_OK:
+            for header, value in headers.items():
+                response[header] = value
+        return response
+
+
+class ConditionalListMixin(ConditionalMixin):
+    """ETag and Last-Modified for the list of the user's objects."""
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(
+            user_state(request.user),
+            lambda: super(ConditionalListMixin, self).list(
+                request, *args, **kwargs
+            ),
+        )
+
+
+class ConditionalRetrieveMixin(ConditionalMixin):
+    """ETag and Last-Modified for a single recipe."""
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            state = recipe_state(
+                request.user,
+                kwargs[self.lookup_url_kwarg or self.lookup_field],
+            )
+        except ValueError:
+            # Not a valid ID, let retrieve answer 404
+            state = None
+
+        return self._conditional(
+            state,
+            lambda: super(ConditionalRetrieveMixin, self).retrieve(
+                request, *args, **kwargs
+            ),
+        )
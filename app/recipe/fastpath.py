@@ -0,0 +1,152 @@
+# Read-only list serialization straight from values() rows.
+#
+# The list endpoints return exactly what the ModelSerializers in
+# recipe.serializers would, but build it from values() dicts and one
+# query per relation instead of creating model instances and running
+# every serializer field over every row.
+import functools
+import itertools
+
+from rest_framework import serializers as drf_serializers
+
+from core.models import Recipe
+from core.timing import timed
+from recipe import serializers
+
+# Serializer fields that represent the model's values as they are
+PASSTHROUGH_FIELDS = (drf_serializers.CharField, drf_serializers.IntegerField)
+
+
+@functools.lru_cache(maxsize=None)
+def _converters(serializer_class):
+    """to_representation of the fields whose values need converting."""
+    return {
+        name: field.to_representation
+        for name, field in serializer_class().fields.items()
+        if not isinstance(field, PASSTHROUGH_FIELDS)
+    }
+
+
+def chunked(rows, size):
+    """Lists of up to size consecutive rows."""
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ValuesListSerializer:
+    """
+    Stand-in for serializer_class(rows, many=True) where rows come from
+    queryset.values(*columns(fields)).
+
+    relations maps a many-to-many field to its through model, the name
+    of the related model on it and the serializer of the related rows.
+    Related rows are ordered by id, as in the prefetches of the views.
+    """
+
+    serializer_class = None
+    relations = {}
+
+    def __init__(self, rows, fields=None, compact=False):
+        self.rows = rows
+        # In declaration order, as the serializer would output them
+        declared = dict.fromkeys(self.serializer_class.Meta.fields)
+        self.fields = [
+            name for name in declared if fields is None or name in fields
+        ]
+        self.compact = compact
+
+    @classmethod
+    def columns(cls, fields=None):
+        """Columns to load with values() for the given fields."""
+        if fields is None:
+            fields = cls.serializer_class.Meta.fields
+        return list(
+            dict.fromkeys(
+                ["id"] + [name for name in fields if name not in cls.relations]
+            )
+        )
+
+    def _links(self, name, ids):
+        """Representations of the related rows of each parent id."""
+        through, related, serializer_class = self.relations[name]
+        column = f"{related}_id"
+        links = through.objects.filter(recipe_id__in=ids).order_by(column)
+
+        by_parent = {}
+        if self.compact:
+            for parent_id, related_id in links.values_list(
+                "recipe_id", column
+            ):
+                by_parent.setdefault(parent_id, []).append(related_id)
+            return by_parent
+
+        keys = serializer_class.Meta.fields
+        for parent_id, *values in links.values_list(
+            "recipe_id", *(f"{related}__{key}" for key in keys)
+        ):
+            by_parent.setdefault(parent_id, []).append(dict(zip(keys, values)))
+        return by_parent
+
+    @property
+    def data(self):
+        with timed("serialize"):
+            return self._data()
+
+    def _data(self):
+        rows = list(self.rows)
+        ids = [row["id"] for row in rows]
+        converters = _converters(self.serializer_class)
+
+        getters = []
+        for name in self.fields:
+            if name in self.relations:
+                links = self._links(name, ids) if ids else {}
+                getters.append((name, links, None))
+            else:
+                getters.append((name, None, converters.get(name)))
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, links, convert in getters:
+                if links is not None:
+                    item[name] = links.get(row["id"], [])
+                else:
+                    value = row[name]
+                    if convert is not None and value is not None:
+                        value = convert(value)
+                    item[name] = value
+            data.append(item)
+        return data
+
+
+class RecipeListSerializer(ValuesListSerializer):
+    serializer_class = serializers.RecipeSerializer
+    relations = {
+        "tags": (Recipe.tags.through, "tag", serializers.TagSerializer),
+        "ingredients": (
+            Recipe.ingredients.through,
+            "ingredient",
+            serializers.IngredientSerializer,
+        ),
+    }
+
+
+class TagListSerializer(ValuesListSerializer):
+    serializer_class = serializers.TagSerializer
+
+
+class IngredientListSerializer(ValuesListSerializer):
+    serializer_class = serializers.IngredientSerializer
+
+
+class TagCountListSerializer(ValuesListSerializer):
+    serializer_class = serializers.TagCountSerializer
+
+
+class IngredientCountListSerializer(ValuesListSerializer):
+    serializer_class = serializers.IngredientCountSerializer
@@ -0,0 +1,161 @@
+# Recipe filtering shared by the API and the management commands
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.db import connections
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    F,
+    FloatField,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce
+
+from core.models import Recipe
+
+MATCH_ANY = "any"
+MATCH_ALL = "all"
+MATCH_MODES = (MATCH_ANY, MATCH_ALL)
+
+
+def _linked(through, column, ids):
+    """Through-table rows linking the outer recipe to any of ids."""
+    return through.objects.filter(
+        recipe_id=OuterRef("pk"), **{f"{column}__in": ids}
+    )
+
+
+def filter_by_links(queryset, through, column, ids, match=MATCH_ANY):
+    """
+    Keep recipes linked to ids through a many-to-many through table.
+
+    Each condition is a correlated EXISTS subquery, so a recipe linked to
+    several of the ids still appears once and no DISTINCT is needed.
+    With match="all" a recipe must be linked to every one of the ids.
+    """
+    ids = sorted(set(ids))
+
+    if match == MATCH_ALL:
+        for related_id in ids:
+            queryset = queryset.filter(
+                Exists(_linked(through, column, [related_id]))
+            )
+        return queryset
+
+    return queryset.filter(Exists(_linked(through, column, ids)))
+
+
+def filter_recipes(
+    queryset, tag_ids=None, ingredient_ids=None, match=MATCH_ANY
+):
+    """Apply the tags/ingredients filters of the recipe list endpoint."""
+    if tag_ids:
+        queryset = filter_by_links(
+            queryset, Recipe.tags.through, "tag_id", tag_ids, match
+        )
+
+    if ingredient_ids:
+        queryset = filter_by_links(
+            queryset,
+            Recipe.ingredients.through,
+            "ingredient_id",
+            ingredient_ids,
+            match,
+        )
+
+    return queryset
+
+
+def search_recipes(queryset, terms):
+    """
+    Full-text search over recipe titles and descriptions.
+
+    On PostgreSQL this matches the trigger-maintained, GIN-indexed
+    search_vector with websearch syntax and annotates search_rank, with
+    title matches ranked above description matches. Other databases
+    (SQLite in local test runs) fall back to requiring every word in the
+    title or description, unranked.
+    """
+    if connections[queryset.db].vendor == "postgresql":
+        query = SearchQuery(terms, config="english", search_type="websearch")
+        return queryset.filter(search_vector=query).annotate(
+            # Double precision, so cursor positions round-trip exactly
+            search_rank=Cast(
+                SearchRank(F("search_vector"), query), FloatField()
+            )
+        )
+
+    for word in terms.split():
+        queryset = queryset.filter(
+            Q(title__icontains=word) | Q(description__icontains=word)
+        )
+    return queryset
+
+
+def usage_count(through, column):
+    """
+    Number of recipes linked to the outer tag/ingredient.
+
+    A grouped, correlated subquery over the through table, answered from
+    its (column, recipe_id) index, so it can be annotated without joining
+    and grouping the outer queryset.
+    """
+    counts = (
+        through.objects.filter(**{column: OuterRef("pk")})
+        .order_by()
+        .values(column)
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def assigned(through, column):
+    """
+    Whether the outer tag/ingredient is linked to any recipe.
+
+    An EXISTS over the through table rather than a join, which would
+    repeat the tag/ingredient once per recipe and need a DISTINCT.
+    """
+    return Exists(through.objects.filter(**{column: OuterRef("pk")}))
+
+
+def autocomplete(queryset, through, column, term, limit):
+    """
+    Up to limit tags/ingredients whose name matches term.
+
+    On PostgreSQL names starting with term or trigram-similar to it match,
+    both served by the pg_trgm GIN index on name, best matches first. On
+    other databases names containing term match, prefix matches first.
+    Ties are broken by how many recipes use the name, annotated as
+    recipe_count.
+    """
+    queryset = queryset.annotate(recipe_count=usage_count(through, column))
+
+    if connections[queryset.db].vendor == "postgresql":
+        queryset = queryset.filter(
+            Q(name__iregex=f"^{re.escape(term)}")
+            | Q(name__trigram_similar=term)
+        ).annotate(similarity=TrigramSimilarity("name", term))
+        queryset = queryset.order_by("-similarity", "-recipe_count", "name")
+        return queryset[:limit]
+
+    queryset = queryset.filter(name__icontains=term).annotate(
+        prefix=Case(
+            When(name__istartswith=term, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
+    return queryset.order_by("-prefix", "-recipe_count", "name")[:limit]
@@ -0,0 +1,162 @@
+# Compare the ModelSerializer and values() (recipe.fastpath) list paths.
+# Seeds throwaway recipes inside a transaction that is rolled back, e.g.
+#   python manage.py bench_serializers --rows 100,1000,10000
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Ingredient, Recipe, Tag
+from recipe import fastpath, serializers
+
+
+class Rollback(Exception):
+    pass
+
+
+def _sizes(value):
+    return [int(size) for size in value.split(",")]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the serializer and values() read paths for recipe, tag and "
+        "ingredient lists, and check that they render identical JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=_sizes,
+            default=[100, 1000, 10000],
+            help="Comma separated list sizes",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--links",
+            type=int,
+            default=3,
+            help="Tags and ingredients per recipe",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _run(self, options):
+        user = get_user_model().objects.create_user(
+            email="bench-serializers@example.com", password=None
+        )
+        for size in options["rows"]:
+            self._seed(user, size, options["links"])
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"=== {size} ==="))
+            for name, slow, fast in self._paths(user):
+                render = JSONRenderer().render
+                if render(slow()) != render(fast()):
+                    raise CommandError(f"{name}: outputs differ")
+
+                slow_ms = self._best(slow, options["repeat"])
+                fast_ms = self._best(fast, options["repeat"])
+                self.stdout.write(
+                    f"{name:<12} serializer {slow_ms:9.2f}ms  "
+                    f"values {fast_ms:9.2f}ms  x{slow_ms / fast_ms:.1f}"
+                )
+
+    def _seed(self, user, size, links):
+        """size recipes, tags and ingredients, links of each per recipe."""
+        for model in (Recipe, Tag, Ingredient):
+            model.objects.filter(user=user).delete()
+
+        Tag.objects.bulk_create(
+            Tag(user=user, name=f"Tag {i}") for i in range(size)
+        )
+        Ingredient.objects.bulk_create(
+            Ingredient(user=user, name=f"Ingredient {i}") for i in range(size)
+        )
+        tags = list(Tag.objects.filter(user=user).values_list("id", flat=True))
+        ingredients = list(
+            Ingredient.objects.filter(user=user).values_list("id", flat=True)
+        )
+
+        Recipe.objects.bulk_create(
+            Recipe(
+                user=user,
+                title=f"Recipe {i}",
+                time_minutes=i % 240,
+                price=Decimal(i % 100000) / 100,
+                description="Lorem ipsum dolor sit amet. " * 10,
+                link=f"https://example.com/{i}",
+            )
+            for i in range(size)
+        )
+        recipe_ids = Recipe.objects.filter(user=user).values_list(
+            "id", flat=True
+        )
+        for through, column, related_ids in (
+            (Recipe.tags.through, "tag_id", tags),
+            (Recipe.ingredients.through, "ingredient_id", ingredients),
+        ):
+            through.objects.bulk_create(
+                through(
+                    recipe_id=recipe_id,
+                    **{column: related_ids[(i * 7 + n) % len(related_ids)]},
+                )
+                for i, recipe_id in enumerate(recipe_ids)
+                for n in range(min(links, len(related_ids)))
+            )
+
+    def _paths(self, user):
+        recipes = Recipe.objects.filter(user=user).order_by("-id")
+
+        def recipes_slow():
+            queryset = recipes.prefetch_related(
+                Prefetch("tags", queryset=Tag.objects.order_by("id")),
+                Prefetch(
+                    "ingredients", queryset=Ingredient.objects.order_by("id")
+                ),
+            )
+            return serializers.RecipeSerializer(queryset, many=True).data
+
+        def recipes_fast():
+            rows = recipes.values(*fastpath.RecipeListSerializer.columns())
+            return fastpath.RecipeListSerializer(rows).data
+
+        yield "recipes", recipes_slow, recipes_fast
+
+        for model, serializer_class, list_serializer_class in (
+            (Tag, serializers.TagSerializer, fastpath.TagListSerializer),
+            (
+                Ingredient,
+                serializers.IngredientSerializer,
+                fastpath.IngredientListSerializer,
+            ),
+        ):
+            queryset = model.objects.filter(user=user).order_by("-name")
+
+            def slow(queryset=queryset, serializer_class=serializer_class):
+                return serializer_class(queryset, many=True).data
+
+            def fast(
+                queryset=queryset, list_serializer_class=list_serializer_class
+            ):
+                rows = queryset.values(*list_serializer_class.columns())
+                return list_serializer_class(rows).data
+
+            yield str(model._meta.verbose_name_plural), slow, fast
+
+    def _best(self, path, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            path()
+            timings.append((time.perf_counter() - start) * 1000)
+        return min(timings)
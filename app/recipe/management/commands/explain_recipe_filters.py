@@ -0,0 +1,107 @@
+# Compare query plans of the recipe list filters and search on a seeded
+# database. Run it against a database with production-like volume (1M+
+# recipes), e.g.
+#   python manage.py explain_recipe_filters --user a@b.com --tags 1,2
+#   python manage.py explain_recipe_filters --user a@b.com --search "curry"
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.models import Recipe
+from recipe.filters import (
+    MATCH_ALL,
+    MATCH_ANY,
+    filter_recipes,
+    search_recipes,
+)
+
+
+def _ids(value):
+    return [int(str_id) for str_id in value.split(",")] if value else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Print EXPLAIN output and timings for the legacy join + DISTINCT "
+        "recipe filter, the EXISTS based filters and full-text search."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", required=True, help="User email")
+        parser.add_argument("--tags", help="Comma separated tag IDs")
+        parser.add_argument(
+            "--ingredients", help="Comma separated ingredient IDs"
+        )
+        parser.add_argument("--search", help="Full-text search terms")
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Run EXPLAIN ANALYZE (executes the queries)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options["user"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+
+        tag_ids = _ids(options["tags"])
+        ingredient_ids = _ids(options["ingredients"])
+        search = options["search"]
+        if not tag_ids and not ingredient_ids and not search:
+            raise CommandError("Pass --tags, --ingredients and/or --search")
+
+        base = Recipe.objects.filter(user=user)
+        plans = {}
+        if tag_ids or ingredient_ids:
+            legacy = base
+            if tag_ids:
+                legacy = legacy.filter(tags__id__in=tag_ids)
+            if ingredient_ids:
+                legacy = legacy.filter(ingredients__id__in=ingredient_ids)
+
+            plans["join + distinct"] = legacy.distinct()
+            for match in (MATCH_ANY, MATCH_ALL):
+                plans[f"exists, match={match}"] = filter_recipes(
+                    base, tag_ids, ingredient_ids, match
+                )
+
+        if search:
+            searched = search_recipes(
+                filter_recipes(base, tag_ids, ingredient_ids), search
+            )
+            ordering = ["-id"]
+            if "search_rank" in searched.query.annotations:
+                ordering.insert(0, "-search_rank")
+            plans[f"search {search!r}"] = searched.order_by(*ordering)
+
+        self.stdout.write(
+            f"{base.count()} recipes for {user.email} "
+            f"on {connection.vendor}"
+        )
+        explain_options = {"analyze": True} if options["analyze"] else {}
+        for name, queryset in plans.items():
+            if not queryset.ordered:
+                queryset = queryset.order_by("-id")
+            page = queryset[: options["page_size"]]
+            self.stdout.write(self.style.MIGRATE_HEADING(f"=== {name} ==="))
+            self.stdout.write(page.explain(**explain_options))
+            self.stdout.write(self._timing(page, options["repeat"]))
+
+    def _timing(self, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = len(queryset.all())
+            timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        return (
+            f"{rows} rows, best {timings[0]:.2f}ms, "
+            f"median {timings[len(timings) // 2]:.2f}ms, "
+            f"worst {timings[-1]:.2f}ms"
+        )
@@ -0,0 +1,290 @@
+# Load recipes from NDJSON or CSV, e.g.
+#   python manage.py import_recipes recipes.ndjson --user a@b.com
+#   python manage.py import_recipes recipes.csv --checkpoint recipes.ckpt
+#
+# NDJSON lines are objects like the lines of /api/recipe/recipes/export/;
+# tags and ingredients may be lists of {"name": ...} objects or of plain
+# names. CSV files have a header row with the same columns, names
+# separated by --separator. An optional "user" key/column (an email)
+# overrides --user.
+import csv
+import itertools
+import json
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.bulk import (
+    copy_rows,
+    get_or_create_by_name,
+    insert_recipes,
+    reserve_ids,
+)
+from recipe.cache import bump_version
+from recipe.fastpath import chunked
+
+FIELDS = ("title", "time_minutes", "price", "link", "description")
+RELATIONS = (
+    ("tags", Tag, Recipe.tags.through, "tag"),
+    ("ingredients", Ingredient, Recipe.ingredients.through, "ingredient"),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import recipes from an NDJSON or CSV file in batches, with COPY on "
+        "PostgreSQL and bulk_create elsewhere. With --checkpoint, rerunning "
+        "the command resumes after the last imported batch; a batch that "
+        "was committed just before a crash may be imported twice."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON or CSV file")
+        parser.add_argument(
+            "--format",
+            choices=["ndjson", "csv"],
+            help="Defaults to csv for .csv files, ndjson otherwise",
+        )
+        parser.add_argument(
+            "--user", help="Email of the owner of rows without a user"
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--separator",
+            default="|",
+            help="Separator of tag/ingredient names in CSV files",
+        )
+        parser.add_argument(
+            "--checkpoint", help="Progress file to resume from and update"
+        )
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options["path"])
+        file_format = options["format"] or (
+            "csv" if path.endswith(".csv") else "ndjson"
+        )
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        self.separator = options["separator"]
+        self.users = {}
+        self.names = {}
+        self.default_user = (
+            self._user(options["user"]) if options["user"] else None
+        )
+
+        state = self._load_checkpoint(options["checkpoint"], path)
+        if state["rows"]:
+            self.stdout.write(f"Resuming after row {state['rows']}")
+
+        started = time.monotonic()
+        processed = 0
+        with open(path, newline="", encoding="utf-8") as source:
+            records = itertools.islice(
+                self._records(source, file_format), state["rows"], None
+            )
+            for batch in chunked(
+                enumerate(records, start=state["rows"] + 1),
+                options["batch_size"],
+            ):
+                items = self._parse_batch(batch, state)
+                with transaction.atomic():
+                    self._import(items)
+
+                processed += len(batch)
+                state["rows"] = batch[-1][0]
+                state["imported"] += len(items)
+                self._save_checkpoint(options["checkpoint"], state)
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"{state['rows']} rows: {state['imported']} imported, "
+                    f"{state['skipped']} skipped, "
+                    f"{processed / elapsed:.0f} rows/s"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {state['imported']} recipes, "
+                f"skipped {state['skipped']} rows"
+            )
+        )
+
+    def _user(self, email):
+        if email not in self.users:
+            try:
+                self.users[email] = get_user_model().objects.get(email=email)
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user with email {email}")
+        return self.users[email]
+
+    def _records(self, source, file_format):
+        """Raw records: dicts for CSV rows, strings for NDJSON lines."""
+        if file_format == "csv":
+            yield from csv.DictReader(source)
+        else:
+            yield from (line for line in source if line.strip())
+
+    def _parse_batch(self, batch, state):
+        items = []
+        for number, record in batch:
+            try:
+                items.append(self._parse(record))
+            except (ValueError, ValidationError, CommandError) as exc:
+                state["skipped"] += 1
+                message = "; ".join(getattr(exc, "messages", [str(exc)]))
+                self.stderr.write(f"Row {number}: {message}")
+        return items
+
+    def _parse(self, record):
+        """(user, field values, tag names, ingredient names) of a record."""
+        if isinstance(record, str):
+            record = json.loads(record)
+            if not isinstance(record, dict):
+                raise ValueError("Expected a JSON object")
+
+        email = record.get("user")
+        user = self._user(email) if email else self.default_user
+        if user is None:
+            raise ValueError("No user, pass --user")
+
+        values = []
+        for name in FIELDS:
+            field = Recipe._meta.get_field(name)
+            value = record.get(name)
+            if value in (None, ""):
+                # The model default, "" for text, None if there is none
+                value = field.get_default()
+            elif isinstance(value, float):
+                # JSON prices like 3.2, as written rather than the binary
+                # float's exact (and too long) decimal expansion
+                value = repr(value)
+            values.append(field.clean(value, None))
+
+        return (
+            user,
+            values,
+            *(
+                self._names(record.get(name), model)
+                for name, model, *_ in RELATIONS
+            ),
+        )
+
+    def _names(self, value, model):
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = value.split(self.separator)
+
+        kind = model._meta.verbose_name_plural
+        if not isinstance(value, list):
+            raise ValueError(f"Expected a list of {kind}")
+
+        names = []
+        for item in value:
+            if isinstance(item, dict):
+                item = item.get("name")
+            if not isinstance(item, str):
+                raise ValueError(
+                    f"Expected {kind} as names or objects with a name"
+                )
+            names.append(item)
+
+        field = model._meta.get_field("name")
+        return list(
+            dict.fromkeys(
+                field.clean(name.strip(), None)
+                for name in names
+                if name.strip()
+            )
+        )
+
+    def _related_ids(self, model, user, names):
+        """IDs of the user's names, created if missing and cached."""
+        known = self.names.setdefault((model, user.pk), {})
+        missing = [name for name in dict.fromkeys(names) if name not in known]
+        if missing:
+            known.update(
+                (obj.name, obj.pk)
+                for obj in get_or_create_by_name(model, user, missing)
+            )
+        return known
+
+    def _import(self, items):
+        if not items:
+            return
+
+        if connection.vendor == "postgresql":
+            recipe_ids = reserve_ids(Recipe, len(items))
+            now = timezone.now()
+            copy_rows(
+                Recipe,
+                ("id", "user", *FIELDS, "updated_at"),
+                (
+                    (recipe_id, user.pk, *values, now)
+                    for recipe_id, (user, values, *_) in zip(recipe_ids, items)
+                ),
+            )
+        else:
+            recipes = insert_recipes(
+                [
+                    Recipe(user=user, **dict(zip(FIELDS, values)))
+                    for user, values, *_ in items
+                ]
+            )
+            recipe_ids = [recipe.pk for recipe in recipes]
+
+        for position, (_, model, through, related) in enumerate(RELATIONS):
+            names_by_user = {}
+            for user, _, *lists in items:
+                names_by_user.setdefault(user, []).extend(lists[position])
+            ids = {
+                user.pk: self._related_ids(model, user, names)
+                for user, names in names_by_user.items()
+            }
+
+            links = [
+                (recipe_id, ids[user.pk][name])
+                for recipe_id, (user, _, *lists) in zip(recipe_ids, items)
+                for name in lists[position]
+            ]
+            if connection.vendor == "postgresql":
+                copy_rows(through, ("recipe", related), links)
+            else:
+                through.objects.bulk_create(
+                    through(recipe_id=recipe_id, **{f"{related}_id": pk})
+                    for recipe_id, pk in links
+                )
+
+        # Neither COPY nor bulk_create sends post_save signals
+        for user in {user for user, *_ in items}:
+            bump_version(user.pk)
+
+    def _load_checkpoint(self, checkpoint, path):
+        state = {"path": path, "rows": 0, "imported": 0, "skipped": 0}
+        if not checkpoint or not os.path.exists(checkpoint):
+            return state
+
+        with open(checkpoint) as f:
+            saved = json.load(f)
+        if saved["path"] != path:
+            raise CommandError(
+                f"Checkpoint {checkpoint} is for {saved['path']}"
+            )
+        state.update(saved)
+        return state
+
+    def _save_checkpoint(self, checkpoint, state):
+        if not checkpoint:
+            return
+
+        # Replaced in one step so a crash can't leave a partial file
+        partial = f"{checkpoint}.tmp"
+        with open(partial, "w") as f:
+            json.dump(state, f)
+        os.replace(partial, checkpoint)
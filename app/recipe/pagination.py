@@ -0,0 +1,133 @@
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+# Between the values of the ordering fields in a cursor position
+POSITION_SEPARATOR = ","
+
+
+class RecipeCursorPagination(CursorPagination):
+    """
+    Keyset pagination for recipe lists.
+
+    Pages are addressed with an opaque cursor that encodes the position
+    of the last seen recipe: its ID, or its search rank and ID for ranked
+    search results. Every page is a single `WHERE (rank, id) < ... LIMIT n`
+    query. No OFFSET is issued and the total number of rows is never
+    counted.
+    """
+
+    ordering = "-id"
+    page_size = settings.RECIPE_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.RECIPE_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        # Ranked search results page by rank, with -id breaking ties
+        if "search_rank" in queryset.query.annotations:
+            return ("-search_rank", "-id")
+        return super().get_ordering(request, queryset, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # As CursorPagination.paginate_queryset, which only filters on the
+        # first ordering field and pages through ties with an OFFSET. Here
+        # positions cover every ordering field, so they are unique and the
+        # offset stays 0.
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = (0, False, None)
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(
+                *(_reverse(order) for order in self.ordering)
+            )
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            try:
+                queryset = queryset.filter(
+                    self._after(current_position, reverse)
+                )
+            except (TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # One extra row tells whether there is a following page
+        end = offset + self.page_size + 1
+        results = list(queryset[offset:end])
+        self.page = results[: self.page_size]
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _after(self, position, reverse):
+        """
+        Rows past position in the direction of travel.
+
+        (a, b) > (x, y) is written a > x OR (a = x AND b > y), which
+        databases without row value comparisons understand too.
+        """
+        values = position.split(POSITION_SEPARATOR)
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        condition = Q()
+        equal = {}
+        for order, value in zip(self.ordering, values):
+            name = order.lstrip("-")
+            lookup = "lt" if order.startswith("-") != reverse else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            name = order.lstrip("-")
+            if isinstance(instance, dict):
+                values.append(str(instance[name]))
+            else:
+                values.append(str(getattr(instance, name)))
+        return POSITION_SEPARATOR.join(values)
+
+
+def _reverse(order):
+    return order[1:] if order.startswith("-") else f"-{order}"
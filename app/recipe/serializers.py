@@ -1,22 +1,86 @@
+from django.db import transaction
 from rest_framework import serializers
 from core.models import Recipe, Tag, Ingredient
+from core.timing import TimedDataMixin, TimedListSerializer
+from recipe.bulk import get_or_create_by_name
 
 
-class TagSerializer(serializers.ModelSerializer):
+class UniqueNameMixin:
+    """Reject renaming a tag/ingredient to a name the user already has."""
+
+    def validate_name(self, value):
+        # Nested in RecipeSerializer existing names are reused, not errors
+        if self.parent is not None:
+            return value
+
+        model = self.Meta.model
+        existing = model.objects.filter(
+            user=self.context["request"].user, name=value
+        )
+        if self.instance is not None:
+            existing = existing.exclude(pk=self.instance.pk)
+
+        if existing.exists():
+            raise serializers.ValidationError(
+                f"{model._meta.verbose_name.capitalize()} already exists."
+            )
+        return value
+
+
+class TagSerializer(
+    UniqueNameMixin, TimedDataMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Tag
         fields = ["id", "name"]
         read_only_fields = ["id"]
+        list_serializer_class = TimedListSerializer
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(
+    UniqueNameMixin, TimedDataMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Ingredient
         fields = ["id", "name"]
         read_only_fields = ["id"]
+        list_serializer_class = TimedListSerializer
+
+
+class TagCountSerializer(TagSerializer):
+    """Tag listed with the number of recipes using it (?recipe_count=1)."""
+
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ["recipe_count"]
+
+
+class IngredientCountSerializer(IngredientSerializer):
+    """Ingredient listed with the number of recipes using it."""
+
+    recipe_count = serializers.IntegerField(read_only=True)
 
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ["recipe_count"]
 
-class RecipeSerializer(serializers.ModelSerializer):
+
+class SparseFieldsMixin:
+    """
+    Serialize only the fields named in the optional fields argument.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class RecipeSerializer(
+    SparseFieldsMixin, TimedDataMixin, serializers.ModelSerializer
+):
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
 
@@ -33,51 +97,72 @@ class RecipeSerializer(serializers.ModelSerializer):
             "ingredients",
         ]
         read_only_fields = ["id"]
+        list_serializer_class = TimedListSerializer
 
     # underscore (_get_...) intends to be an internal method.
     # A method that's only used in RecipeSerializer.
-    def _get_or_create_ingredients(self, ingredients, recipe):
+    def _get_or_create_ingredients(self, ingredients):
         auth_user = self.context["request"].user
+        names = [ingredient["name"] for ingredient in ingredients]
 
-        for ingredient in ingredients:
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user, **ingredient
-            )
-            recipe.ingredients.add(ingredient_obj)
+        return get_or_create_by_name(Ingredient, auth_user, names)
 
-    def _get_or_create_tags(self, tags, recipe):
+    def _get_or_create_tags(self, tags):
         auth_user = self.context["request"].user
+        names = [tag["name"] for tag in tags]
 
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(user=auth_user, **tag)
-            recipe.tags.add(tag_obj)
+        return get_or_create_by_name(Tag, auth_user, names)
 
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop("tags", [])
         ingredients = validated_data.pop("ingredients", [])
 
         recipe = Recipe.objects.create(**validated_data)
-        self._get_or_create_tags(tags, recipe)
-        self._get_or_create_ingredients(ingredients, recipe)
+        recipe.tags.add(*self._get_or_create_tags(tags))
+        recipe.ingredients.add(*self._get_or_create_ingredients(ingredients))
 
         return recipe
 
+    def _set_links(self, manager, objs):
+        """
+        Link exactly objs. set() diffs against the current links: only
+        removed links are deleted and only new ones inserted, each in a
+        single query. Returns whether anything changed.
+        """
+        current = {obj.pk for obj in manager.all()}
+        manager.set(objs)
+        return current != {obj.pk for obj in objs}
+
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop("tags", None)
         ingredients = validated_data.pop("ingredients", None)
+        links_changed = False
 
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            links_changed |= self._set_links(
+                instance.tags, self._get_or_create_tags(tags)
+            )
 
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            links_changed |= self._set_links(
+                instance.ingredients,
+                self._get_or_create_ingredients(ingredients),
+            )
 
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
+        changed_fields = [
+            attr
+            for attr, value in validated_data.items()
+            if getattr(instance, attr) != value
+        ]
+        for attr in changed_fields:
+            setattr(instance, attr, validated_data[attr])
 
-        instance.save()
+        # updated_at also moves when only the links changed, so ETags of
+        # the recipe change with its tags and ingredients
+        if changed_fields or links_changed:
+            instance.save(update_fields=changed_fields + ["updated_at"])
         return instance
 
 
@@ -86,6 +171,13 @@ class RecipeDetailSerializer(RecipeSerializer):
         fields = RecipeSerializer.Meta.fields + ["description"]
 
 
+class RecipeCompactSerializer(RecipeSerializer):
+    """Read-only representation with tags and ingredients as ids."""
+
+    tags = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    ingredients = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+
 class RecipeImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
@@ -0,0 +1,32 @@
+# Invalidate the response cache of a user whenever their data changes
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.cache import bump_version
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_owner(sender, instance, **kwargs):
+    bump_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_links_owner(sender, instance, action, **kwargs):
+    # instance is the recipe, or the tag/ingredient for reverse changes
+    if action.startswith("post_"):
+        bump_version(instance.user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def start_version(sender, instance, created, **kwargs):
+    # A new user never sees responses cached under a reused user ID
+    if created:
+        bump_version(instance.pk)
@@ -0,0 +1,126 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe.cache import cache_stats, reset_cache_stats, response_cache
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+BULK_URL = reverse("recipe:recipe-bulk")
+
+
+def create_recipe(user, **params):
+    defaults = {
+        "title": "Sample recipe title",
+        "time_minutes": 22,
+        "price": Decimal("5.25"),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+@override_settings(RECIPE_RESPONSE_CACHE_ENABLED=True)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        reset_cache_stats()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_served_from_cache(self):
+        create_recipe(user=self.user)
+        first = self.client.get(RECIPES_URL)
+
+        # Only the ETag validators are read from the database
+        with self.assertNumQueries(1):
+            second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(cache_stats()["hits"], 1)
+        self.assertEqual(cache_stats()["misses"], 1)
+
+    def test_query_params_cached_separately(self):
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        create_recipe(user=self.user).tags.add(tag)
+        create_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL, {"tags": tag.id})
+        self.assertEqual(len(res.data["results"]), 1)
+
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_create_invalidates(self):
+        self.client.get(RECIPES_URL)
+        payload = {"title": "New", "time_minutes": 5, "price": "1.00"}
+        self.client.post(RECIPES_URL, payload)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_bulk_create_invalidates(self):
+        self.client.get(RECIPES_URL)
+        self.client.get(TAGS_URL)
+        payload = [
+            {
+                "title": "New",
+                "time_minutes": 5,
+                "price": "1.00",
+                "tags": [{"name": "Quick"}],
+            }
+        ]
+        self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(len(self.client.get(RECIPES_URL).data["results"]), 1)
+        self.assertEqual(len(self.client.get(TAGS_URL).data), 1)
+
+    def test_tag_rename_invalidates_recipe_list(self):
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        create_recipe(user=self.user).tags.add(tag)
+        self.client.get(RECIPES_URL)
+
+        tag.name = "Plant based"
+        tag.save()
+
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.data["results"][0]["tags"][0]["name"], tag.name)
+
+    def test_link_change_invalidates(self):
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        recipe = create_recipe(user=self.user)
+        self.client.get(TAGS_URL, {"assigned_only": 1})
+
+        # Reverse side of the relation, as the admin's tag form would
+        tag.recipe_set.add(recipe)
+
+        res = self.client.get(TAGS_URL, {"assigned_only": 1})
+        self.assertEqual(len(res.data), 1)
+
+    def test_other_users_write_keeps_cache(self):
+        other_user = get_user_model().objects.create_user(
+            email="other@example.com", password="testpass123"
+        )
+        self.client.get(RECIPES_URL)
+        create_recipe(user=other_user)
+
+        with self.assertNumQueries(1):
+            self.client.get(RECIPES_URL)
+
+    @override_settings(RECIPE_RESPONSE_CACHE_ENABLED=False)
+    def test_kill_switch(self):
+        self.client.get(RECIPES_URL)
+
+        self.client.get(RECIPES_URL)
+
+        self.assertEqual(cache_stats()["hits"], 0)
+        self.assertEqual(cache_stats()["misses"], 0)
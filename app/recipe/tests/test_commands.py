@@ -0,0 +1,243 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.models import Ingredient, Recipe, Tag
+
+
+class ExplainRecipeFiltersTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.tag = Tag.objects.create(user=self.user, name="Vegan")
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title="Stir fry",
+            time_minutes=10,
+            price=Decimal("5.00"),
+        )
+        recipe.tags.add(self.tag)
+
+    def test_explain_prints_each_plan(self):
+        out = StringIO()
+        call_command(
+            "explain_recipe_filters",
+            user=self.user.email,
+            tags=str(self.tag.id),
+            repeat=1,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn("join + distinct", output)
+        self.assertIn("exists, match=any", output)
+        self.assertIn("exists, match=all", output)
+        self.assertIn("1 rows", output)
+
+    def test_explain_search(self):
+        out = StringIO()
+        call_command(
+            "explain_recipe_filters",
+            user=self.user.email,
+            search="stir",
+            repeat=1,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn("search 'stir'", output)
+        self.assertNotIn("join + distinct", output)
+        self.assertIn("1 rows", output)
+
+    def test_explain_requires_filter(self):
+        with self.assertRaises(CommandError):
+            call_command("explain_recipe_filters", user=self.user.email)
+
+
+class BenchSerializersTests(TestCase):
+    def test_bench_compares_paths_and_rolls_back(self):
+        out = StringIO()
+        call_command("bench_serializers", rows=[5, 20], repeat=1, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("=== 20 ===", output)
+        for name in ("recipes", "tags", "ingredients"):
+            self.assertEqual(output.count(f"{name} "), 2)
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(get_user_model().objects.exists())
+
+
+class ImportRecipesTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        Tag.objects.create(user=self.user, name="Vegan")
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def _ndjson(self, rows):
+        return "".join(json.dumps(row) + "\n" for row in rows)
+
+    def _import(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command(
+            "import_recipes",
+            path,
+            user=self.user.email,
+            stdout=out,
+            stderr=err,
+            **options,
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_import_ndjson(self):
+        path = self._write(
+            "recipes.ndjson",
+            self._ndjson(
+                [
+                    {
+                        "title": "Tofu stir fry",
+                        "price": "5.50",
+                        "time_minutes": 15,
+                        "tags": [{"name": "Vegan"}, {"name": "Quick"}],
+                        "ingredients": ["Tofu", "Rice"],
+                    },
+                    {
+                        "title": "Kale salad",
+                        "price": 3.2,
+                        "description": "Crunchy",
+                        "tags": ["Vegan"],
+                        "ingredients": ["Kale", "Tofu", "Kale"],
+                    },
+                ]
+            ),
+        )
+
+        out, err = self._import(path, batch_size=1)
+
+        self.assertIn("Imported 2 recipes", out)
+        self.assertEqual(err, "")
+        salad = Recipe.objects.get(title="Kale salad")
+        self.assertEqual(salad.price, Decimal("3.20"))
+        self.assertEqual(salad.time_minutes, 5)
+        self.assertEqual(salad.description, "Crunchy")
+        self.assertEqual(salad.link, "")
+        self.assertEqual(
+            sorted(salad.ingredients.values_list("name", flat=True)),
+            ["Kale", "Tofu"],
+        )
+        # Existing names are reused, new ones created once
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 3)
+
+    def test_import_csv(self):
+        path = self._write(
+            "recipes.csv",
+            "title,price,time_minutes,tags,ingredients,user\n"
+            "Pancakes,2.00,20,Breakfast|Vegan,Flour|Milk,\n"
+            '"Soup, hot",4.00,30,,Leek,user@example.com\n',
+        )
+
+        out, _ = self._import(path)
+
+        self.assertIn("Imported 2 recipes", out)
+        pancakes = Recipe.objects.get(title="Pancakes")
+        self.assertEqual(
+            sorted(pancakes.tags.values_list("name", flat=True)),
+            ["Breakfast", "Vegan"],
+        )
+        self.assertTrue(Recipe.objects.filter(title="Soup, hot").exists())
+
+    def test_invalid_rows_skipped(self):
+        path = self._write(
+            "recipes.ndjson",
+            "not json\n"
+            + self._ndjson(
+                [
+                    {"title": "", "price": "1.00"},
+                    {"title": "Too expensive", "price": "12345.00"},
+                    {"title": "Nobody", "price": "1.00", "user": "x@y.z"},
+                    {"title": "Fine", "price": "1.00"},
+                ]
+            ),
+        )
+
+        out, err = self._import(path)
+
+        self.assertIn("Imported 1 recipes, skipped 4 rows", out)
+        for number in range(1, 5):
+            self.assertIn(f"Row {number}:", err)
+        self.assertEqual(Recipe.objects.get().title, "Fine")
+
+    def test_malformed_tags_and_ingredients_skipped(self):
+        path = self._write(
+            "recipes.ndjson",
+            self._ndjson(
+                [
+                    {"title": "A", "price": "1.00", "tags": [{"nom": "a"}]},
+                    {"title": "B", "price": "1.00", "ingredients": [5]},
+                    {"title": "C", "price": "1.00", "tags": {"name": "a"}},
+                    {"title": "Fine", "price": "1.00", "tags": ["Vegan"]},
+                ]
+            ),
+        )
+
+        out, err = self._import(path)
+
+        self.assertIn("Imported 1 recipes, skipped 3 rows", out)
+        for number in range(1, 4):
+            self.assertIn(f"Row {number}:", err)
+        self.assertEqual(Recipe.objects.get().title, "Fine")
+
+    def test_batch_size_must_be_positive(self):
+        path = self._write("recipes.ndjson", self._ndjson([{"title": "A"}]))
+        with self.assertRaisesMessage(CommandError, "--batch-size"):
+            self._import(path, batch_size=0)
+
+    def test_resume_from_checkpoint(self):
+        rows = [{"title": f"Recipe {i}", "price": "1.00"} for i in range(5)]
+        checkpoint = os.path.join(self.tmp.name, "import.ckpt")
+        path = self._write("recipes.ndjson", self._ndjson(rows[:3]))
+        self._import(path, checkpoint=checkpoint, batch_size=2)
+
+        with open(checkpoint) as f:
+            self.assertEqual(json.load(f)["rows"], 3)
+
+        self._write("recipes.ndjson", self._ndjson(rows))
+        out, _ = self._import(path, checkpoint=checkpoint, batch_size=2)
+
+        self.assertIn("Resuming after row 3", out)
+        self.assertIn("rows/s", out)
+        self.assertEqual(
+            sorted(Recipe.objects.values_list("title", flat=True)),
+            [row["title"] for row in rows],
+        )
+
+    def test_checkpoint_of_other_file(self):
+        checkpoint = os.path.join(self.tmp.name, "import.ckpt")
+        first = self._write("a.ndjson", "")
+        self._import(first, checkpoint=checkpoint)
+        # Empty input never writes the checkpoint
+        self.assertFalse(os.path.exists(checkpoint))
+
+        self._write("a.ndjson", self._ndjson([{"title": "A", "price": 1}]))
+        self._import(first, checkpoint=checkpoint)
+        second = self._write("b.ndjson", "")
+
+        with self.assertRaises(CommandError):
+            self._import(second, checkpoint=checkpoint)
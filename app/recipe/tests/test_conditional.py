@@ -0,0 +1,156 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+def detail_url(recipe_id):
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    defaults = {
+        "title": "Sample recipe title",
+        "time_minutes": 22,
+        "price": Decimal("5.25"),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_returns_validators(self):
+        create_recipe(user=self.user)
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", res)
+
+    def test_list_not_modified(self):
+        create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)["ETag"]
+
+        # Only the validators are read, nothing is serialized
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+        self.assertEqual(res["ETag"], etag)
+
+    def test_list_etag_depends_on_query(self):
+        create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)["ETag"]
+
+        res = self.client.get(
+            RECIPES_URL, {"page_size": 1}, HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_modified_by_writes(self):
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        recipe.tags.add(tag)
+        etag = self.client.get(RECIPES_URL)["ETag"]
+
+        tag.name = "Plant based"
+        tag.save()
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        etag = res["ETag"]
+        Recipe.objects.filter(pk=recipe.pk).delete()
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_ignores_if_modified_since(self):
+        create_recipe(user=self.user)
+        last_modified = self.client.get(RECIPES_URL)["Last-Modified"]
+
+        res = self.client.get(
+            RECIPES_URL, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_detail_not_modified(self):
+        recipe = create_recipe(user=self.user)
+        first = self.client.get(detail_url(recipe.id))
+
+        res = self.client.get(
+            detail_url(recipe.id), HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_modified_by_deleted_tag(self):
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        recipe.tags.add(tag)
+        first = self.client.get(detail_url(recipe.id))
+
+        # Deleting the tag moves no timestamp of the recipe's
+        self.client.delete(reverse("recipe:tag-detail", args=[tag.id]))
+
+        res = self.client.get(
+            detail_url(recipe.id),
+            HTTP_IF_MODIFIED_SINCE=first["Last-Modified"],
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["tags"], [])
+
+        res = self.client.get(
+            detail_url(recipe.id), HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_detail_modified_by_tag_change(self):
+        recipe = create_recipe(user=self.user)
+        etag = self.client.get(detail_url(recipe.id))["ETag"]
+
+        self.client.patch(
+            detail_url(recipe.id),
+            {"tags": [{"name": "Lunch"}]},
+            format="json",
+        )
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["tags"][0]["name"], "Lunch")
+
+    def test_detail_of_other_user_not_found(self):
+        other_user = get_user_model().objects.create_user(
+            email="other@example.com", password="testpass123"
+        )
+        recipe = create_recipe(user=other_user)
+
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH="*")
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tag_list_not_modified(self):
+        Tag.objects.create(user=self.user, name="Vegan")
+        etag = self.client.get(TAGS_URL)["ETag"]
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Tag.objects.create(user=self.user, name="Dessert")
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
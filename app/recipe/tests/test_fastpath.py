@@ -0,0 +1,146 @@
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from core.models import Recipe, Tag, Ingredient
+from recipe import fastpath, serializers
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+INGREDIENTS_URL = reverse("recipe:ingredient-list")
+
+
+def create_user(**kwargs):
+    return get_user_model().objects.create_user(**kwargs)
+
+
+class FastPathEquivalenceTests(TestCase):
+    """The values() read path renders byte-identical JSON."""
+
+    def setUp(self):
+        self.user = create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ("Vegan", "Dinner", 'Ünïcode "quoted"')
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ("Salt", "Kale", "Tofu")
+        ]
+        prices = ["5", "12.5", "0.99", "999.99"]
+        for i, price in enumerate(prices):
+            linked_tags = tags[:i]
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f"Recipe {i} – “special”",
+                time_minutes=i * 7,
+                price=Decimal(price),
+                description="Line one\nLine two" if i % 2 else "",
+                link="" if i % 2 else f"http://example.com/{i}.pdf",
+            )
+            # Linked out of id order on purpose
+            recipe.tags.add(*reversed(linked_tags))
+            if i % 2:
+                recipe.ingredients.add(*ingredients[1:])
+            else:
+                recipe.ingredients.add(*ingredients)
+
+    def _render(self, data):
+        return JSONRenderer().render(data)
+
+    def _slow(self, fields=None, compact=False):
+        serializer_class = (
+            serializers.RecipeCompactSerializer
+            if compact
+            else serializers.RecipeSerializer
+        )
+        recipes = Recipe.objects.order_by("-id").prefetch_related(
+            Prefetch("tags", queryset=Tag.objects.order_by("id")),
+            Prefetch(
+                "ingredients", queryset=Ingredient.objects.order_by("id")
+            ),
+        )
+        return serializer_class(recipes, many=True, fields=fields).data
+
+    def _fast(self, fields=None, compact=False):
+        columns = fastpath.RecipeListSerializer.columns(fields)
+        rows = Recipe.objects.order_by("-id").values(*columns)
+        return fastpath.RecipeListSerializer(
+            rows, fields=fields, compact=compact
+        ).data
+
+    def test_recipes(self):
+        cases = [
+            None,
+            ["id", "title"],
+            ["price", "tags"],
+            ["ingredients", "description", "link", "time_minutes"],
+            [],
+        ]
+        for fields in cases:
+            for compact in (False, True):
+                with self.subTest(fields=fields, compact=compact):
+                    self.assertEqual(
+                        self._render(self._fast(fields, compact)),
+                        self._render(self._slow(fields, compact)),
+                    )
+
+    def test_tags_and_ingredients(self):
+        for model, serializer_class, list_serializer_class in (
+            (Tag, serializers.TagSerializer, fastpath.TagListSerializer),
+            (
+                Ingredient,
+                serializers.IngredientSerializer,
+                fastpath.IngredientListSerializer,
+            ),
+        ):
+            with self.subTest(model=model.__name__):
+                queryset = model.objects.order_by("-name")
+                rows = queryset.values(*list_serializer_class.columns())
+                self.assertEqual(
+                    self._render(list_serializer_class(rows).data),
+                    self._render(serializer_class(queryset, many=True).data),
+                )
+
+    def test_api_responses(self):
+        requests = [
+            (RECIPES_URL, {}),
+            (RECIPES_URL, {"page_size": 2}),
+            (RECIPES_URL, {"fields": "id,title,tags"}),
+            (RECIPES_URL, {"omit": "description", "compact": 1}),
+            (RECIPES_URL, {"search": "recipe", "tags": "1,2"}),
+            (TAGS_URL, {}),
+            (TAGS_URL, {"assigned_only": 1}),
+            (TAGS_URL, {"ordering": "popular"}),
+            (INGREDIENTS_URL, {"recipe_count": 1}),
+            (INGREDIENTS_URL, {"q": "a", "recipe_count": 1}),
+            (INGREDIENTS_URL, {"q": "a"}),
+        ]
+        for url, params in requests:
+            with self.subTest(url=url, params=params):
+                with override_settings(RECIPE_FAST_LISTS=False):
+                    slow = self.client.get(url, params)
+                with override_settings(RECIPE_FAST_LISTS=True):
+                    fast = self.client.get(url, params)
+
+                self.assertEqual(fast.status_code, slow.status_code)
+                self.assertEqual(fast.content, slow.content)
+
+    def test_next_page_matches(self):
+        with override_settings(RECIPE_FAST_LISTS=True):
+            first = self.client.get(RECIPES_URL, {"page_size": 3})
+            rest = self.client.get(first.data["next"])
+
+        self.assertEqual(len(rest.data["results"]), 1)
+        self.assertEqual(
+            rest.data["results"][0]["id"],
+            Recipe.objects.order_by("id").first().id,
+        )
@@ -1,10 +1,12 @@
 from decimal import Decimal
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import TestCase
 from rest_framework import status
 from rest_framework.test import APIClient
 from core.models import Ingredient, Recipe
+from core.testing import QueryBudgetMixin
 from recipe.serializers import IngredientSerializer
 
 INGREDIENTS_URL = reverse("recipe:ingredient-list")
@@ -27,7 +29,7 @@ class PublicIngredientsApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateIngredientsApiTests(TestCase):
+class PrivateIngredientsApiTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         self.client = APIClient()
         self.user = create_user(email="test@example.com", password="test123")
@@ -117,3 +119,106 @@ class PrivateIngredientsApiTests(TestCase):
 
         res = self.client.get(INGREDIENTS_URL, {"assigned_only": 1})
         self.assertEqual(len(res.data), 1)
+
+    def test_assigned_only_zero_lists_all_ingredients(self):
+        Ingredient.objects.create(user=self.user, name="Eggs")
+        Ingredient.objects.create(user=self.user, name="Lentils")
+
+        res = self.client.get(INGREDIENTS_URL, {"assigned_only": 0})
+
+        self.assertEqual(len(res.data), 2)
+
+    def test_popular_ingredients_with_recipe_count(self):
+        eggs = Ingredient.objects.create(user=self.user, name="Eggs")
+        Ingredient.objects.create(user=self.user, name="Lentils")
+        for title in ("Omelette", "Scrambled eggs"):
+            recipe = Recipe.objects.create(
+                title=title,
+                time_minutes=5,
+                price=Decimal("2.00"),
+                user=self.user,
+            )
+            recipe.ingredients.add(eggs)
+
+        res = self.client.get(
+            INGREDIENTS_URL, {"ordering": "popular", "assigned_only": 1}
+        )
+
+        self.assertEqual(
+            res.data, [{"id": eggs.id, "name": "Eggs", "recipe_count": 2}]
+        )
+
+    def test_list_query_budget(self):
+        for count in (1, 10, 1000):
+            with self.subTest(count=count):
+                Ingredient.objects.filter(user=self.user).delete()
+                Ingredient.objects.bulk_create(
+                    Ingredient(user=self.user, name=f"Ingredient {i}")
+                    for i in range(count)
+                )
+
+                # ETag validators and the list itself
+                with self.assertQueryBudget(2):
+                    res = self.client.get(INGREDIENTS_URL)
+
+                self.assertEqual(len(res.data), count)
+
+                # Counted by one grouped subquery, not a query per row
+                with self.assertQueryBudget(2):
+                    self.client.get(INGREDIENTS_URL, {"recipe_count": 1})
+
+    def test_autocomplete_prefix_and_usage_first(self):
+        garlic = Ingredient.objects.create(user=self.user, name="Garlic")
+        powder = Ingredient.objects.create(
+            user=self.user, name="Garlic powder"
+        )
+        wild = Ingredient.objects.create(user=self.user, name="Wild garlic")
+        Ingredient.objects.create(user=self.user, name="Ginger")
+        recipe = Recipe.objects.create(
+            title="Garlic bread",
+            time_minutes=10,
+            price=Decimal("3.00"),
+            user=self.user,
+        )
+        recipe.ingredients.add(powder)
+
+        res = self.client.get(INGREDIENTS_URL, {"q": "garl"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [ingredient["name"] for ingredient in res.data]
+        self.assertEqual(names[:2], [powder.name, garlic.name])
+        self.assertIn(wild.name, names)
+        self.assertNotIn("Ginger", names)
+
+    def test_autocomplete_limit(self):
+        Ingredient.objects.bulk_create(
+            Ingredient(user=self.user, name=f"Salt {i}") for i in range(30)
+        )
+
+        res = self.client.get(INGREDIENTS_URL, {"q": "salt"})
+        self.assertEqual(len(res.data), settings.RECIPE_AUTOCOMPLETE_LIMIT)
+
+        res = self.client.get(INGREDIENTS_URL, {"q": "salt", "limit": 3})
+        self.assertEqual(len(res.data), 3)
+
+        res = self.client.get(INGREDIENTS_URL, {"q": "salt", "limit": 0})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocomplete_limited_to_user(self):
+        user2 = create_user(email="user2@example.com", password="testpass123")
+        Ingredient.objects.create(user=user2, name="Salt")
+
+        res = self.client.get(INGREDIENTS_URL, {"q": "salt"})
+
+        self.assertEqual(res.data, [])
+
+    def test_autocomplete_query_budget(self):
+        Ingredient.objects.bulk_create(
+            Ingredient(user=self.user, name=f"Pepper {i}") for i in range(100)
+        )
+
+        # ETag validators and the suggestions, usage counted in SQL
+        with self.assertQueryBudget(2):
+            res = self.client.get(INGREDIENTS_URL, {"q": "pepper"})
+
+        self.assertEqual(len(res.data), settings.RECIPE_AUTOCOMPLETE_LIMIT)
@@ -1,19 +1,31 @@
+import gzip
+import json
 import os
 import tempfile
+from unittest import skipUnless
 
 from PIL import Image
 from decimal import Decimal
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.db.models import Case, FloatField, Value, When
+from django.db.models.signals import m2m_changed
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 
 from core.models import Recipe, Tag, Ingredient
+from core.testing import QueryBudgetMixin
+from recipe.pagination import RecipeCursorPagination
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 RECIPES_URL = reverse("recipe:recipe-list")
+BULK_URL = reverse("recipe:recipe-bulk")
+EXPORT_URL = reverse("recipe:recipe-export")
 
 
 def detail_url(recipe_id):
@@ -67,7 +79,7 @@ class PrivateRecipeAPITests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_recipe_list_limited_to_user(self):
         other_user = create_user(
@@ -81,7 +93,7 @@ class PrivateRecipeAPITests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_get_recipe_detail(self):
         recipe = create_recipe(user=self.user)
@@ -217,6 +229,19 @@ class PrivateRecipeAPITests(TestCase):
 
             self.assertTrue(exists)
 
+    def test_create_recipe_with_repeated_tag(self):
+        payload = {
+            "title": "Pad thai",
+            "time_minutes": 20,
+            "price": Decimal("9.50"),
+            "tags": [{"name": "Thai"}, {"name": "Thai"}],
+        }
+        res = self.client.post(RECIPES_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(len(res.data["tags"]), 1)
+
     def test_create_tag_on_update(self):
         recipe = create_recipe(user=self.user)
         payload = {"tags": [{"name": "Lunch"}]}
@@ -242,6 +267,62 @@ class PrivateRecipeAPITests(TestCase):
         self.assertIn(tag_lunch, recipe.tags.all())
         self.assertNotIn(tag_breakfast, recipe.tags.all())
 
+    def test_update_tags_only_changes_diff(self):
+        tag_keep = Tag.objects.create(user=self.user, name="Keep")
+        tag_drop = Tag.objects.create(user=self.user, name="Drop")
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag_keep, tag_drop)
+        payload = {"tags": [{"name": "Keep"}, {"name": "New"}]}
+
+        actions = []
+
+        def record(sender, action, pk_set, **kwargs):
+            actions.append((action, pk_set))
+
+        m2m_changed.connect(record, sender=Recipe.tags.through)
+        self.addCleanup(
+            m2m_changed.disconnect, record, sender=Recipe.tags.through
+        )
+        res = self.client.patch(detail_url(recipe.id), payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        tag_new = Tag.objects.get(user=self.user, name="New")
+        self.assertIn(("post_remove", {tag_drop.id}), actions)
+        self.assertIn(("post_add", {tag_new.id}), actions)
+        self.assertNotIn("post_clear", [action for action, _ in actions])
+        self.assertEqual(set(recipe.tags.all()), {tag_keep, tag_new})
+
+    def test_update_unchanged_tags_writes_nothing(self):
+        tag = Tag.objects.create(user=self.user, name="Keep")
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag)
+        payload = {"tags": [{"name": "Keep"}]}
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(
+                detail_url(recipe.id), payload, format="json"
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for query in ctx.captured_queries:
+            sql = query["sql"].upper()
+            self.assertFalse(sql.startswith(("INSERT", "DELETE", "UPDATE")))
+
+    def test_partial_update_saves_changed_fields_only(self):
+        recipe = create_recipe(user=self.user, title="Old title")
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.patch(detail_url(recipe.id), {"title": "New title"})
+
+        updates = [
+            query["sql"]
+            for query in ctx.captured_queries
+            if query["sql"].startswith("UPDATE")
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"title"', updates[0])
+        self.assertNotIn('"description"', updates[0])
+
     def test_clear_recipe_tags(self):
         tag = Tag.objects.create(user=self.user, name="Dessert")
         recipe = create_recipe(user=self.user)
@@ -352,13 +433,13 @@ class PrivateRecipeAPITests(TestCase):
         res = self.client.get(RECIPES_URL, params)
 
         s1 = RecipeSerializer(r1)
-        self.assertIn(s1.data, res.data)
+        self.assertIn(s1.data, res.data["results"])
 
         s2 = RecipeSerializer(r2)
-        self.assertIn(s2.data, res.data)
+        self.assertIn(s2.data, res.data["results"])
 
         s3 = RecipeSerializer(r3)
-        self.assertNotIn(s3.data, res.data)
+        self.assertNotIn(s3.data, res.data["results"])
 
     def test_filter_by_ingredients(self):
         r1 = create_recipe(user=self.user, title="Posh beans on toast")
@@ -375,13 +456,638 @@ class PrivateRecipeAPITests(TestCase):
         res = self.client.get(RECIPES_URL, params)
 
         s1 = RecipeSerializer(r1)
-        self.assertIn(s1.data, res.data)
+        self.assertIn(s1.data, res.data["results"])
 
         s2 = RecipeSerializer(r2)
-        self.assertIn(s2.data, res.data)
+        self.assertIn(s2.data, res.data["results"])
 
         s3 = RecipeSerializer(r3)
-        self.assertNotIn(s3.data, res.data)
+        self.assertNotIn(s3.data, res.data["results"])
+
+    def test_filter_by_tags_match_all(self):
+        tag1 = Tag.objects.create(user=self.user, name="Vegan")
+        tag2 = Tag.objects.create(user=self.user, name="Quick")
+        r1 = create_recipe(user=self.user, title="Vegan stir fry")
+        r1.tags.add(tag1, tag2)
+        r2 = create_recipe(user=self.user, title="Vegan stew")
+        r2.tags.add(tag1)
+
+        params = {"tags": f"{tag1.id},{tag2.id}", "match": "all"}
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe["id"] for recipe in res.data["results"]], [r1.id]
+        )
+
+    def test_filter_by_ingredients_match_all(self):
+        in1 = Ingredient.objects.create(user=self.user, name="Rice")
+        in2 = Ingredient.objects.create(user=self.user, name="Beans")
+        r1 = create_recipe(user=self.user, title="Rice and beans")
+        r1.ingredients.add(in1, in2)
+        r2 = create_recipe(user=self.user, title="Fried rice")
+        r2.ingredients.add(in1)
+
+        params = {"ingredients": f"{in1.id},{in2.id}", "match": "all"}
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(
+            [recipe["id"] for recipe in res.data["results"]], [r1.id]
+        )
+
+    def test_filter_recipe_with_several_matches_listed_once(self):
+        tag1 = Tag.objects.create(user=self.user, name="Vegan")
+        tag2 = Tag.objects.create(user=self.user, name="Quick")
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag1, tag2)
+
+        params = {"tags": f"{tag1.id},{tag2.id}"}
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(
+            [recipe["id"] for recipe in res.data["results"]], [recipe.id]
+        )
+        for query in ctx.captured_queries:
+            self.assertNotIn("DISTINCT", query["sql"].upper())
+
+    def test_filter_invalid_match_mode(self):
+        res = self.client.get(RECIPES_URL, {"tags": "1", "match": "some"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_title_and_description(self):
+        r1 = create_recipe(
+            user=self.user, title="Green curry", description="Spicy"
+        )
+        r2 = create_recipe(
+            user=self.user, title="Noodles", description="With curry paste"
+        )
+        create_recipe(user=self.user, title="Apple pie", description="Sweet")
+
+        res = self.client.get(RECIPES_URL, {"search": "curry"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {recipe["id"] for recipe in res.data["results"]}, {r1.id, r2.id}
+        )
+
+    def test_search_combined_with_tag_filter(self):
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        r1 = create_recipe(user=self.user, title="Vegetable curry")
+        r1.tags.add(tag)
+        create_recipe(user=self.user, title="Chicken curry")
+
+        res = self.client.get(RECIPES_URL, {"search": "curry", "tags": tag.id})
+
+        self.assertEqual(
+            [recipe["id"] for recipe in res.data["results"]], [r1.id]
+        )
+
+    def test_search_limited_to_user(self):
+        other_user = create_user(email="other@example.com", password="pass123")
+        create_recipe(user=other_user, title="Curry")
+
+        res = self.client.get(RECIPES_URL, {"search": "curry"})
+
+        self.assertEqual(res.data["results"], [])
+
+    @skipUnless(connection.vendor == "postgresql", "Ranked search only")
+    def test_search_ranked_and_paginated(self):
+        in_description = create_recipe(
+            user=self.user, title="Noodles", description="With curry paste"
+        )
+        in_title = create_recipe(
+            user=self.user, title="Green curry", description="Spicy"
+        )
+        create_recipe(user=self.user, title="Red curry", description="Hot")
+
+        res = self.client.get(RECIPES_URL, {"search": "curry", "page_size": 2})
+        ids = [recipe["id"] for recipe in res.data["results"]]
+        self.assertNotIn(in_description.id, ids)
+        self.assertIn(in_title.id, ids)
+
+        res = self.client.get(res.data["next"])
+        self.assertEqual(
+            [recipe["id"] for recipe in res.data["results"]],
+            [in_description.id],
+        )
+
+
+class RecipePaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_is_paginated(self):
+        recipes = [create_recipe(user=self.user) for _ in range(3)]
+
+        res = self.client.get(RECIPES_URL, {"page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe["id"] for recipe in res.data["results"]],
+            [recipes[2].id, recipes[1].id],
+        )
+        self.assertIsNotNone(res.data["next"])
+        self.assertIsNone(res.data["previous"])
+        self.assertNotIn("count", res.data)
+
+    def test_follow_next_cursor(self):
+        recipes = [create_recipe(user=self.user) for _ in range(5)]
+
+        seen = []
+        url = RECIPES_URL + "?page_size=2"
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen.extend(recipe["id"] for recipe in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEqual(seen, [recipe.id for recipe in reversed(recipes)])
+
+    def test_page_size_capped(self):
+        create_recipe(user=self.user)
+        res = self.client.get(RECIPES_URL, {"page_size": 10**6})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_pagination_with_filters(self):
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        tagged = []
+        for _ in range(3):
+            recipe = create_recipe(user=self.user)
+            recipe.tags.add(tag)
+            tagged.append(recipe)
+            create_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL, {"tags": tag.id, "page_size": 2})
+        self.assertEqual(
+            [recipe["id"] for recipe in res.data["results"]],
+            [tagged[2].id, tagged[1].id],
+        )
+
+        res = self.client.get(res.data["next"])
+        self.assertEqual(
+            [recipe["id"] for recipe in res.data["results"]],
+            [tagged[0].id],
+        )
+        self.assertIsNone(res.data["next"])
+
+    def test_pages_through_tied_search_ranks(self):
+        recipes = [create_recipe(user=self.user) for _ in range(5)]
+        top = create_recipe(user=self.user)
+        # Stands in for ts_rank, which gives equal ranks to many recipes
+        queryset = Recipe.objects.annotate(
+            search_rank=Case(
+                When(pk=top.pk, then=Value(0.9)),
+                default=Value(0.25),
+                output_field=FloatField(),
+            )
+        )
+        factory = APIRequestFactory()
+
+        ids = []
+        url = "/api/recipe/recipes/?page_size=2"
+        while url:
+            paginator = RecipeCursorPagination()
+            request = Request(factory.get(url))
+            with CaptureQueriesContext(connection) as ctx:
+                page = paginator.paginate_queryset(queryset, request)
+            self.assertNotIn("OFFSET", ctx.captured_queries[0]["sql"])
+            ids += [recipe.id for recipe in page]
+            url = paginator.get_next_link()
+
+        self.assertEqual(
+            ids, [top.id] + [recipe.id for recipe in reversed(recipes)]
+        )
+
+        # And back from the last page
+        request = Request(factory.get(paginator.get_previous_link()))
+        page = paginator.paginate_queryset(queryset, request)
+        self.assertEqual(
+            [recipe.id for recipe in page], [recipes[3].id, recipes[2].id]
+        )
+
+    def test_no_offset_or_count_queries(self):
+        for _ in range(3):
+            create_recipe(user=self.user)
+        res = self.client.get(RECIPES_URL, {"page_size": 1})
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(res.data["next"])
+
+        page_queries = [
+            query["sql"].upper()
+            for query in ctx.captured_queries
+            if query["sql"].startswith('SELECT "core_recipe"')
+        ]
+        self.assertEqual(len(page_queries), 1)
+        self.assertNotIn("OFFSET", page_queries[0])
+        self.assertNotIn("COUNT(", page_queries[0])
+
+
+class RecipeQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Query counts must not grow with the number of recipes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(self.user)
+        self.tags = [
+            Tag.objects.create(user=self.user, name=f"Tag {i}")
+            for i in range(2)
+        ]
+        self.ingredients = [
+            Ingredient.objects.create(user=self.user, name=f"Ingredient {i}")
+            for i in range(2)
+        ]
+
+    def _seed(self, count):
+        Recipe.objects.filter(user=self.user).delete()
+        Recipe.objects.bulk_create(
+            Recipe(
+                user=self.user,
+                title=f"Recipe {i}",
+                time_minutes=10,
+                price=Decimal("5.00"),
+            )
+            for i in range(count)
+        )
+        recipes = list(Recipe.objects.filter(user=self.user))
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+            for recipe in recipes
+            for tag in self.tags
+        )
+        Recipe.ingredients.through.objects.bulk_create(
+            Recipe.ingredients.through(
+                recipe_id=recipe.id, ingredient_id=ingredient.id
+            )
+            for recipe in recipes
+            for ingredient in self.ingredients
+        )
+        return recipes
+
+    def test_list_query_budget(self):
+        for count in (1, 10, 1000):
+            with self.subTest(count=count):
+                self._seed(count)
+
+                # ETag validators, recipes, tags, ingredients
+                with self.assertQueryBudget(4):
+                    res = self.client.get(RECIPES_URL, {"page_size": count})
+
+                self.assertEqual(len(res.data["results"]), count)
+                self.assertEqual(len(res.data["results"][0]["tags"]), 2)
+
+    def test_retrieve_query_budget(self):
+        recipe = self._seed(1)[0]
+
+        with self.assertQueryBudget(4):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(len(res.data["ingredients"]), 2)
+
+    def test_update_query_budget(self):
+        recipe = self._seed(1)[0]
+
+        with self.assertQueryBudget(6):
+            res = self.client.patch(detail_url(recipe.id), {"title": "New"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["tags"]), 2)
+
+    def test_create_with_many_ingredients_query_budget(self):
+        payload = {
+            "title": "Everything stew",
+            "time_minutes": 90,
+            "price": Decimal("15.00"),
+            "ingredients": [{"name": f"Ingredient {i}"} for i in range(30)],
+        }
+
+        # add() checks for existing links first as m2m_changed has receivers
+        with self.assertQueryBudget(8):
+            res = self.client.post(RECIPES_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["ingredients"]), 30)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 30)
+
+
+class RecipeFieldSelectionTests(QueryBudgetMixin, TestCase):
+    """Sparse fieldsets (?fields=, ?omit=) and ?compact=1."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+        self.tag = Tag.objects.create(user=self.user, name="Vegan")
+        self.ingredient = Ingredient.objects.create(
+            user=self.user, name="Tofu"
+        )
+        self.recipe.tags.add(self.tag)
+        self.recipe.ingredients.add(self.ingredient)
+
+    def test_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL, {"fields": "id,title"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"],
+            [{"id": self.recipe.id, "title": self.recipe.title}],
+        )
+        # Only the selected columns are loaded and nothing is prefetched
+        page_sql = queries[-1]["sql"]
+        self.assertNotIn("description", page_sql)
+        self.assertNotIn("link", page_sql)
+        self.assertEqual(len(queries), 2)
+
+    def test_omit(self):
+        res = self.client.get(
+            detail_url(self.recipe.id), {"omit": "description,ingredients"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("description", res.data)
+        self.assertNotIn("ingredients", res.data)
+        self.assertEqual(
+            res.data["tags"], [{"id": self.tag.id, "name": "Vegan"}]
+        )
+
+    def test_unknown_field_rejected(self):
+        res = self.client.get(RECIPES_URL, {"fields": "id,user"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("user", str(res.data["fields"]))
+
+    def test_compact(self):
+        res = self.client.get(RECIPES_URL, {"compact": 1})
+
+        recipe = res.data["results"][0]
+        self.assertEqual(recipe["tags"], [self.tag.id])
+        self.assertEqual(recipe["ingredients"], [self.ingredient.id])
+        self.assertEqual(recipe["title"], self.recipe.title)
+
+    def test_fields_query_budget(self):
+        # ETag validators and recipes; no tag/ingredient prefetch
+        with self.assertQueryBudget(2):
+            self.client.get(RECIPES_URL, {"fields": "id,title,price"})
+
+    def test_writes_return_all_fields(self):
+        res = self.client.patch(
+            detail_url(self.recipe.id) + "?fields=id", {"title": "New"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["title"], "New")
+        self.assertIn("tags", res.data)
+
+
+@override_settings(RECIPE_EXPORT_CHUNK_SIZE=2)
+class RecipeExportTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name="Vegan")
+        for i in range(5):
+            recipe = create_recipe(user=self.user, title=f"Recipe {i}")
+            recipe.tags.add(self.tag)
+        create_recipe(
+            user=create_user(email="other@example.com", password="pass123")
+        )
+
+    def _lines(self, content):
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_export_streams_all_recipes(self):
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        self.assertIn("attachment", res["Content-Disposition"])
+
+        recipes = Recipe.objects.filter(user=self.user).order_by("-id")
+        expected = json.loads(
+            json.dumps(RecipeSerializer(recipes, many=True).data)
+        )
+        self.assertEqual(
+            self._lines(b"".join(res.streaming_content)), expected
+        )
+
+    def test_export_query_budget(self):
+        # Recipes, then tags and ingredients for each chunk of 2
+        with self.assertQueryBudget(1 + 3 * 2):
+            content = b"".join(self.client.get(EXPORT_URL).streaming_content)
+
+        self.assertEqual(len(content.splitlines()), 5)
+
+    def test_export_gzip(self):
+        res = self.client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING="gzip, br")
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", res["Vary"])
+        content = gzip.decompress(b"".join(res.streaming_content))
+        self.assertEqual(len(self._lines(content)), 5)
+
+    def test_export_fields_and_compact(self):
+        res = self.client.get(EXPORT_URL, {"fields": "id,tags", "compact": 1})
+
+        lines = self._lines(b"".join(res.streaming_content))
+        self.assertEqual(
+            lines[0], {"id": lines[0]["id"], "tags": [self.tag.id]}
+        )
+
+    def test_export_requires_auth(self):
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class BulkRecipeAPITests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(self.user)
+
+    def _payload(self, count):
+        return [
+            {
+                "title": f"Recipe {i}",
+                "time_minutes": 10,
+                "price": "5.00",
+                "tags": [{"name": "Quick"}, {"name": f"Tag {i % 2}"}],
+                "ingredients": [{"name": "Salt"}],
+            }
+            for i in range(count)
+        ]
+
+    def test_bulk_create(self):
+        res = self.client.post(BULK_URL, self._payload(3), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        results = res.data["results"]
+        self.assertEqual([result["index"] for result in results], [0, 1, 2])
+        self.assertEqual(results[1]["data"]["title"], "Recipe 1")
+        self.assertEqual(
+            {tag["name"] for tag in results[1]["data"]["tags"]},
+            {"Quick", "Tag 1"},
+        )
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_create_query_count_independent_of_size(self):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            self.skipTest("Backend inserts recipes one at a time")
+
+        for count in (1, 10, 100):
+            with self.subTest(count=count):
+                with self.assertQueryBudget(13):
+                    res = self.client.post(
+                        BULK_URL, self._payload(count), format="json"
+                    )
+                self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_bulk_create_atomic_writes_nothing_on_error(self):
+        payload = self._payload(2)
+        payload[1]["price"] = "not a price"
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        results = res.data["results"]
+        self.assertEqual(
+            results[0]["status"], status.HTTP_424_FAILED_DEPENDENCY
+        )
+        self.assertIn("price", results[1]["errors"])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_best_effort(self):
+        payload = self._payload(2)
+        payload[1]["price"] = "not a price"
+
+        res = self.client.post(
+            BULK_URL + "?mode=best_effort", payload, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        results = res.data["results"]
+        self.assertEqual(results[0]["status"], status.HTTP_201_CREATED)
+        self.assertEqual(results[1]["status"], status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_limit(self):
+        with self.settings(RECIPE_BULK_MAX_ITEMS=2):
+            res = self.client.post(BULK_URL, self._payload(3), format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_requires_list(self):
+        res = self.client.post(BULK_URL, self._payload(1)[0], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update(self):
+        r1 = create_recipe(user=self.user, title="First")
+        r2 = create_recipe(user=self.user, title="Second")
+        payload = [
+            {"id": r1.id, "title": "First updated"},
+            {"id": r2.id, "tags": [{"name": "Lunch"}]},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        r1.refresh_from_db()
+        self.assertEqual(r1.title, "First updated")
+        self.assertEqual(
+            list(r2.tags.values_list("name", flat=True)), ["Lunch"]
+        )
+        self.assertEqual(
+            res.data["results"][1]["data"]["tags"][0]["name"], "Lunch"
+        )
+
+    def test_bulk_update_other_users_recipe_not_found(self):
+        other_user = create_user(email="other@example.com", password="pass123")
+        mine = create_recipe(user=self.user, title="Mine")
+        theirs = create_recipe(user=other_user, title="Theirs")
+        payload = [
+            {"id": mine.id, "title": "Changed"},
+            {"id": theirs.id, "title": "Changed"},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["results"][1]["status"], status.HTTP_404_NOT_FOUND
+        )
+        mine.refresh_from_db()
+        theirs.refresh_from_db()
+        self.assertEqual(mine.title, "Mine")
+        self.assertEqual(theirs.title, "Theirs")
+
+    def test_bulk_delete_best_effort(self):
+        other_user = create_user(email="other@example.com", password="pass123")
+        mine = create_recipe(user=self.user)
+        theirs = create_recipe(user=other_user)
+
+        res = self.client.delete(
+            BULK_URL + "?mode=best_effort",
+            [mine.id, theirs.id],
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertFalse(Recipe.objects.filter(id=mine.id).exists())
+        self.assertTrue(Recipe.objects.filter(id=theirs.id).exists())
+
+    def test_bulk_delete_rejects_non_integer_ids(self):
+        # true == 1, but isn't recipe 1
+        recipe = create_recipe(user=self.user, id=1)
+
+        for item in ({"id": recipe.id}, [recipe.id], True):
+            with self.subTest(item=item):
+                res = self.client.delete(BULK_URL, [item], format="json")
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("id", res.data["results"][0]["errors"])
+                self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
+
+    def test_bulk_update_rejects_non_integer_ids(self):
+        recipe = create_recipe(user=self.user, id=1, title="Unchanged")
+
+        for item in (
+            {"id": {"id": recipe.id}, "title": "Changed"},
+            {"id": [recipe.id], "title": "Changed"},
+            {"id": True, "title": "Changed"},
+            [recipe.id],
+        ):
+            with self.subTest(item=item):
+                res = self.client.patch(BULK_URL, [item], format="json")
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("id", res.data["results"][0]["errors"])
+                recipe.refresh_from_db()
+                self.assertEqual(recipe.title, "Unchanged")
 
 
 class ImageUploadTests(TestCase):
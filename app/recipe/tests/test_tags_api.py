@@ -5,6 +5,7 @@ from django.test import TestCase
 from rest_framework import status
 from rest_framework.test import APIClient
 from core.models import Tag, Recipe
+from core.testing import QueryBudgetMixin
 from recipe.serializers import TagSerializer
 
 TAGS_URL = reverse("recipe:tag-list")
@@ -27,7 +28,7 @@ class PublicTagsApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateTagsApiTests(TestCase):
+class PrivateTagsApiTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         self.user = create_user(
             email="test@example.com", password="testpass123"
@@ -68,6 +69,15 @@ class PrivateTagsApiTests(TestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload["name"])
 
+    def test_update_tag_to_existing_name_error(self):
+        Tag.objects.create(user=self.user, name="Dinner")
+        tag = Tag.objects.create(user=self.user, name="Supper")
+        res = self.client.patch(detail_url(tag.id), {"name": "Dinner"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, "Supper")
+
     def test_delete_tag(self):
         tag = Tag.objects.create(user=self.user, name="Breakfast")
         url = detail_url(tag.id)
@@ -115,3 +125,98 @@ class PrivateTagsApiTests(TestCase):
 
         res = self.client.get(TAGS_URL, {"assigned_only": 1})
         self.assertEqual(len(res.data), 1)
+
+    def test_assigned_only_zero_lists_all_tags(self):
+        Tag.objects.create(user=self.user, name="Breakfast")
+        Tag.objects.create(user=self.user, name="Dinner")
+
+        res = self.client.get(TAGS_URL, {"assigned_only": 0})
+
+        self.assertEqual(len(res.data), 2)
+
+    def test_popular_tags_with_recipe_count(self):
+        vegan = Tag.objects.create(user=self.user, name="Vegan")
+        quick = Tag.objects.create(user=self.user, name="Quick")
+        Tag.objects.create(user=self.user, name="Dessert")
+        for title in ("Salad", "Curry"):
+            recipe = Recipe.objects.create(
+                title=title,
+                time_minutes=10,
+                price=Decimal("5.00"),
+                user=self.user,
+            )
+            recipe.tags.add(vegan)
+        recipe.tags.add(quick)
+
+        res = self.client.get(TAGS_URL, {"ordering": "popular"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(tag["name"], tag["recipe_count"]) for tag in res.data],
+            [("Vegan", 2), ("Quick", 1), ("Dessert", 0)],
+        )
+
+    def test_recipe_count_only_when_requested(self):
+        Tag.objects.create(user=self.user, name="Vegan")
+
+        res = self.client.get(TAGS_URL)
+        self.assertNotIn("recipe_count", res.data[0])
+
+        res = self.client.get(TAGS_URL, {"recipe_count": 1})
+        self.assertEqual(res.data[0]["recipe_count"], 0)
+
+    def test_invalid_ordering(self):
+        res = self.client.get(TAGS_URL, {"ordering": "name"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update_ignores_list_ordering_and_counts(self):
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+
+        res = self.client.patch(
+            detail_url(tag.id) + "?ordering=name&recipe_count=1",
+            {"name": "Vegetarian"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"id": tag.id, "name": "Vegetarian"})
+
+    def test_update_and_delete_ignore_autocomplete(self):
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+
+        res = self.client.patch(
+            detail_url(tag.id) + "?q=veg", {"name": "Vegetarian"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.delete(detail_url(tag.id) + "?q=veg")
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Tag.objects.filter(id=tag.id).exists())
+
+    def test_list_query_budget(self):
+        for count in (1, 10, 1000):
+            with self.subTest(count=count):
+                Tag.objects.filter(user=self.user).delete()
+                Tag.objects.bulk_create(
+                    Tag(user=self.user, name=f"Tag {i}") for i in range(count)
+                )
+
+                # ETag validators and the list itself
+                with self.assertQueryBudget(2):
+                    res = self.client.get(TAGS_URL)
+
+                self.assertEqual(len(res.data), count)
+
+                # Counted by one grouped subquery, not a query per tag
+                with self.assertQueryBudget(2):
+                    self.client.get(
+                        TAGS_URL, {"ordering": "popular", "assigned_only": 1}
+                    )
+
+    def test_autocomplete_tags(self):
+        Tag.objects.create(user=self.user, name="Breakfast")
+        Tag.objects.create(user=self.user, name="Dinner")
+
+        res = self.client.get(TAGS_URL, {"q": "break"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([tag["name"] for tag in res.data], ["Breakfast"])
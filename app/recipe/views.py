@@ -1,10 +1,34 @@
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
+from core.authentication import CachedTokenAuthentication
 from core.models import Recipe, Tag, Ingredient
+from core.renderers import NDJSONRenderer
 from recipe import serializers
+from recipe.bulk import bulk_create_recipes
+from recipe.cache import CachedListMixin
+from recipe import fastpath
+from recipe.conditional import ConditionalListMixin, ConditionalRetrieveMixin
+from recipe.filters import (
+    MATCH_ANY,
+    MATCH_MODES,
+    assigned,
+    autocomplete,
+    filter_recipes,
+    search_recipes,
+    usage_count,
+)
+from recipe.pagination import RecipeCursorPagination
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
@@ -12,10 +36,53 @@ from drf_spectacular.utils import (
     OpenApiTypes,
 )
 
+BULK_ATOMIC = "atomic"
+BULK_BEST_EFFORT = "best_effort"
+BULK_MODES = (BULK_ATOMIC, BULK_BEST_EFFORT)
+BULK_INVALID_ID = {
+    "status": status.HTTP_400_BAD_REQUEST,
+    "errors": {"id": ["Expected an integer recipe ID."]},
+}
+
+# ?ordering= of the tag and ingredient lists, most used first
+ORDERING_POPULAR = "popular"
+
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+
+# Actions whose responses can be trimmed with ?fields=, ?omit= and
+# ?compact=
+READ_ACTIONS = ("list", "retrieve")
+
+FIELD_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        OpenApiTypes.STR,
+        description="Comma separated list of fields to return",
+    ),
+    OpenApiParameter(
+        "omit",
+        OpenApiTypes.STR,
+        description="Comma separated list of fields to leave out",
+    ),
+    OpenApiParameter(
+        "compact",
+        OpenApiTypes.INT,
+        enum=[0, 1],
+        description="Return tags and ingredients as lists of IDs",
+    ),
+]
+
+
+def is_recipe_id(value):
+    """Whether a bulk item is a recipe ID: an int, but not a bool."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
 
 @extend_schema_view(
+    retrieve=extend_schema(parameters=FIELD_PARAMETERS),
     list=extend_schema(
-        parameters=[
+        parameters=FIELD_PARAMETERS
+        + [
             OpenApiParameter(
                 "tags",
                 OpenApiTypes.STR,
@@ -26,15 +93,38 @@ from drf_spectacular.utils import (
                 OpenApiTypes.STR,
                 description="Comma separated list of IDs to filter",
             ),
+            OpenApiParameter(
+                "match",
+                OpenApiTypes.STR,
+                enum=list(MATCH_MODES),
+                description=(
+                    "any (default) returns recipes with at least one of the "
+                    "requested tags/ingredients, all returns recipes with "
+                    "every one of them"
+                ),
+            ),
+            OpenApiParameter(
+                "search",
+                OpenApiTypes.STR,
+                description=(
+                    "Full-text search over title and description. Results "
+                    "are ordered by relevance."
+                ),
+            ),
         ]
-    )
+    ),
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
+    CachedListMixin,
+    viewsets.ModelViewSet,
+):
     """
     Manage recipes in the database.
 
     This viewset provides CRUD operations for Recipe objects:
-    * List all recipes
+    * List all recipes, a page at a time (see RecipeCursorPagination)
     * Create a new recipe
     * Retrieve a specific recipe
     * Update a recipe
@@ -46,8 +136,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     serializer_class = serializers.RecipeSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
 
     def _params_to_ints(self, qs):
         "Converts 1,2,3 ids to [1, 2, 3]"
@@ -56,38 +147,149 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """
         Retrieve recipes for the authenticated user.
-        Returns recipes sorted by ID in descending order.
+        Returns recipes sorted by ID in descending order, or by relevance
+        when searching.
         """
         tags = self.request.query_params.get("tags")
         ingredients = self.request.query_params.get("ingredients")
+        match = self.request.query_params.get("match", MATCH_ANY)
         queryset = self.queryset
 
-        if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+        if match not in MATCH_MODES:
+            raise ValidationError(
+                {"match": f"Expected one of: {', '.join(MATCH_MODES)}."}
+            )
 
-        if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+        if self.action in READ_ACTIONS and not self._fast_list():
+            queryset = self._only_selected_fields(queryset)
+        # Nested tags and ingredients are serialized for these actions.
+        # Fetch them in one query each rather than one per recipe.
+        elif self.action in ("update", "partial_update"):
+            queryset = queryset.prefetch_related("tags", "ingredients")
 
-        return (
-            queryset.filter(user=self.request.user).order_by("-id").distinct()
+        queryset = filter_recipes(
+            queryset,
+            tag_ids=self._params_to_ints(tags) if tags else None,
+            ingredient_ids=(
+                self._params_to_ints(ingredients) if ingredients else None
+            ),
+            match=match,
         )
 
+        queryset = queryset.filter(user=self.request.user)
+
+        search = self.request.query_params.get("search", "").strip()
+        if search:
+            queryset = search_recipes(queryset, search)
+
+        if "search_rank" in queryset.query.annotations:
+            queryset = queryset.order_by("-search_rank", "-id")
+        else:
+            queryset = queryset.order_by("-id")
+
+        if self._fast_list():
+            # Rows for fastpath.RecipeListSerializer. The annotations are
+            # kept for the cursor paginator.
+            return queryset.values(
+                *fastpath.RecipeListSerializer.columns(
+                    self._selected_fields()
+                ),
+                *queryset.query.annotations,
+            )
+        return queryset
+
     def get_serializer_class(self):
         """
         Return appropriate serializer class.
 
         Returns:
+            RecipeCompactSerializer for reads with ?compact=1
             RecipeDetailSerializer for retrieve actions
             RecipeSerializer for all other actions
         """
+        if self.action in READ_ACTIONS and self._compact():
+            return serializers.RecipeCompactSerializer
         if self.action == "retrieve" or self.action == "update":
             return serializers.RecipeDetailSerializer
         elif self.action == "upload_image":  # our custom action
             return serializers.RecipeImageSerializer
         return self.serializer_class
 
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get("many") and self._fast_list():
+            return fastpath.RecipeListSerializer(
+                *args, fields=self._selected_fields(), compact=self._compact()
+            )
+        if self.action in READ_ACTIONS:
+            kwargs.setdefault("fields", self._selected_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def _fast_list(self):
+        return self.action == "list" and settings.RECIPE_FAST_LISTS
+
+    def _compact(self):
+        return self.request.query_params.get("compact", "0") == "1"
+
+    def _params_to_names(self, param):
+        value = self.request.query_params.get(param, "")
+        return [name.strip() for name in value.split(",") if name.strip()]
+
+    def _selected_fields(self):
+        """
+        Names of the serializer fields requested with ?fields= (default
+        all) minus those in ?omit=.
+        """
+        if not hasattr(self, "_fields"):
+            available = list(
+                dict.fromkeys(self.get_serializer_class().Meta.fields)
+            )
+            requested = self._params_to_names("fields")
+            omitted = self._params_to_names("omit")
+
+            unknown = set(requested + omitted) - set(available)
+            if unknown:
+                raise ValidationError(
+                    {
+                        "fields": (
+                            f"Unknown fields: {', '.join(sorted(unknown))}. "
+                            f"Expected any of: {', '.join(available)}."
+                        )
+                    }
+                )
+
+            self._fields = [
+                name
+                for name in available
+                if (not requested or name in requested) and name not in omitted
+            ]
+        return self._fields
+
+    def _only_selected_fields(self, queryset):
+        """
+        Load only the columns and relations of the selected fields.
+
+        Omitted columns (e.g. the unbounded description) are deferred and
+        omitted tags/ingredients are not prefetched. Compact responses
+        only need the ids of the related rows. Related rows are ordered by
+        id, like fastpath.RecipeListSerializer orders them.
+        """
+        fields = self._selected_fields()
+        relations = {"tags": Tag, "ingredients": Ingredient}
+
+        queryset = queryset.only(
+            "id", *(name for name in fields if name not in relations)
+        )
+        for name, model in relations.items():
+            if name not in fields:
+                continue
+            related = model.objects.order_by("id")
+            if self._compact():
+                related = related.only("id")
+            queryset = queryset.prefetch_related(
+                Prefetch(name, queryset=related)
+            )
+        return queryset
+
     def perform_create(self, serializer):
         """Create a new recipe with the authenticated user."""
         serializer.save(user=self.request.user)
@@ -104,6 +306,270 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(
+        parameters=FIELD_PARAMETERS,
+        responses=serializers.RecipeSerializer,
+        description=(
+            "All of the user's recipes as newline-delimited JSON, one "
+            "recipe per line. Gzipped when the client accepts it."
+        ),
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        renderer_classes=[NDJSONRenderer],
+    )
+    def export(self, request):
+        """
+        Stream the recipes in chunks of RECIPE_EXPORT_CHUNK_SIZE: rows
+        come from a server-side cursor and each chunk's tags and
+        ingredients from one query per relation, so memory use doesn't
+        grow with the number of recipes.
+        """
+        fields = self._selected_fields()
+        rows = self.get_queryset().values(
+            *fastpath.RecipeListSerializer.columns(fields)
+        )
+        chunks = self._export_chunks(
+            rows.iterator(chunk_size=settings.RECIPE_EXPORT_CHUNK_SIZE),
+            fields,
+        )
+
+        gzipped = ACCEPTS_GZIP.search(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        if gzipped:
+            chunks = compress_sequence(chunks)
+
+        response = StreamingHttpResponse(
+            chunks, content_type=NDJSONRenderer.media_type
+        )
+        response["Content-Disposition"] = (
+            'attachment; filename="recipes.ndjson"'
+        )
+        if gzipped:
+            response["Content-Encoding"] = "gzip"
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
+
+    def _export_chunks(self, rows, fields):
+        renderer = NDJSONRenderer()
+        for chunk in fastpath.chunked(rows, settings.RECIPE_EXPORT_CHUNK_SIZE):
+            yield renderer.render(
+                fastpath.RecipeListSerializer(
+                    chunk, fields=fields, compact=self._compact()
+                ).data
+            )
+
+    @extend_schema(
+        request=serializers.RecipeSerializer(many=True),
+        parameters=[
+            OpenApiParameter(
+                "mode",
+                OpenApiTypes.STR,
+                enum=list(BULK_MODES),
+                description=(
+                    "atomic (default) writes nothing unless every item is "
+                    "valid, best_effort writes the valid items"
+                ),
+            ),
+        ],
+    )
+    @action(methods=["POST", "PATCH", "DELETE"], detail=False, url_path="bulk")
+    def bulk(self, request):
+        """
+        Create, update or delete many recipes in one request.
+
+        POST takes a list of recipes, PATCH a list of partial recipes that
+        include their id and DELETE a list of recipe IDs. The response has
+        one result per item, in the order they were sent.
+        """
+        mode = request.query_params.get("mode", BULK_ATOMIC)
+        items = request.data
+
+        if mode not in BULK_MODES:
+            raise ValidationError(
+                {"mode": f"Expected one of: {', '.join(BULK_MODES)}."}
+            )
+        if not isinstance(items, list):
+            raise ValidationError({"items": "Expected a list of items."})
+        if len(items) > settings.RECIPE_BULK_MAX_ITEMS:
+            raise ValidationError(
+                {
+                    "items": (
+                        f"At most {settings.RECIPE_BULK_MAX_ITEMS} items "
+                        "per request."
+                    )
+                }
+            )
+
+        handler = {
+            "POST": self._bulk_create,
+            "PATCH": self._bulk_update,
+            "DELETE": self._bulk_delete,
+        }[request.method]
+        results = handler(items, atomic=mode == BULK_ATOMIC)
+
+        succeeded = [result["status"] < 400 for result in results]
+        if all(succeeded):
+            response_status = (
+                status.HTTP_201_CREATED
+                if request.method == "POST"
+                else status.HTTP_200_OK
+            )
+        elif any(succeeded):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+
+        return Response({"results": results}, status=response_status)
+
+    def _bulk_results(self, errors, atomic):
+        """
+        Per-item results for items that failed validation. In atomic mode
+        the valid items fail too, as nothing will be written.
+        """
+        results = [None] * len(errors)
+        failed = any(error is not None for error in errors)
+        for index, error in enumerate(errors):
+            if error is not None:
+                results[index] = {"index": index, **error}
+            elif atomic and failed:
+                results[index] = {
+                    "index": index,
+                    "status": status.HTTP_424_FAILED_DEPENDENCY,
+                }
+        return results, atomic and failed
+
+    def _bulk_data(self, recipe_ids):
+        """Serialized recipes by ID, with tags/ingredients prefetched."""
+        recipes = Recipe.objects.filter(id__in=recipe_ids).prefetch_related(
+            "tags", "ingredients"
+        )
+        return {
+            recipe.id: self.get_serializer(recipe).data for recipe in recipes
+        }
+
+    def _bulk_create(self, items, atomic):
+        item_serializers = [self.get_serializer(data=item) for item in items]
+        errors = [
+            (
+                None
+                if serializer.is_valid()
+                else {
+                    "status": status.HTTP_400_BAD_REQUEST,
+                    "errors": serializer.errors,
+                }
+            )
+            for serializer in item_serializers
+        ]
+        results, failed = self._bulk_results(errors, atomic)
+        if failed:
+            return results
+
+        valid = [i for i, result in enumerate(results) if result is None]
+        with transaction.atomic():
+            recipes = bulk_create_recipes(
+                self.request.user,
+                [item_serializers[i].validated_data for i in valid],
+            )
+
+        data = self._bulk_data([recipe.id for recipe in recipes])
+        for index, recipe in zip(valid, recipes):
+            results[index] = {
+                "index": index,
+                "status": status.HTTP_201_CREATED,
+                "data": data[recipe.id],
+            }
+        return results
+
+    def _bulk_update(self, items, atomic):
+        ids = [
+            item.get("id") if isinstance(item, dict) else None
+            for item in items
+        ]
+        recipes = Recipe.objects.filter(
+            user=self.request.user,
+            id__in=[recipe_id for recipe_id in ids if is_recipe_id(recipe_id)],
+        ).prefetch_related("tags", "ingredients")
+        recipes = {recipe.id: recipe for recipe in recipes}
+
+        item_serializers = []
+        errors = []
+        for item, recipe_id in zip(items, ids):
+            if not is_recipe_id(recipe_id):
+                item_serializers.append(None)
+                errors.append(BULK_INVALID_ID)
+                continue
+
+            recipe = recipes.get(recipe_id)
+            serializer = self.get_serializer(recipe, data=item, partial=True)
+            item_serializers.append(serializer)
+
+            if recipe is None:
+                errors.append(
+                    {"status": status.HTTP_404_NOT_FOUND, "id": recipe_id}
+                )
+            elif not serializer.is_valid():
+                errors.append(
+                    {
+                        "status": status.HTTP_400_BAD_REQUEST,
+                        "id": recipe_id,
+                        "errors": serializer.errors,
+                    }
+                )
+            else:
+                errors.append(None)
+
+        results, failed = self._bulk_results(errors, atomic)
+        if failed:
+            return results
+
+        valid = [i for i, result in enumerate(results) if result is None]
+        with transaction.atomic():
+            for index in valid:
+                item_serializers[index].save()
+
+        data = self._bulk_data([ids[index] for index in valid])
+        for index in valid:
+            results[index] = {
+                "index": index,
+                "status": status.HTTP_200_OK,
+                "data": data[ids[index]],
+            }
+        return results
+
+    def _bulk_delete(self, items, atomic):
+        recipes = Recipe.objects.filter(
+            user=self.request.user,
+            id__in=[item for item in items if is_recipe_id(item)],
+        )
+        found = set(recipes.values_list("id", flat=True))
+        errors = []
+        for item in items:
+            if not is_recipe_id(item):
+                errors.append(BULK_INVALID_ID)
+            elif item in found:
+                errors.append(None)
+            else:
+                errors.append(
+                    {"status": status.HTTP_404_NOT_FOUND, "id": item}
+                )
+        results, failed = self._bulk_results(errors, atomic)
+        if failed:
+            return results
+
+        recipes.delete()
+        for index, item in enumerate(items):
+            if results[index] is None:
+                results[index] = {
+                    "index": index,
+                    "status": status.HTTP_204_NO_CONTENT,
+                    "id": item,
+                }
+        return results
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -114,36 +580,153 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 enum=[0, 1],  # 0 = False or 1 = True
                 description="Filter by items assigned to recipes",
             ),
+            OpenApiParameter(
+                "recipe_count",
+                OpenApiTypes.INT,
+                enum=[0, 1],
+                description="Include the number of recipes using each item",
+            ),
+            OpenApiParameter(
+                "ordering",
+                OpenApiTypes.STR,
+                enum=[ORDERING_POPULAR],
+                description=(
+                    "popular lists the most used items first and includes "
+                    "recipe_count. Ignored with q."
+                ),
+            ),
+            OpenApiParameter(
+                "q",
+                OpenApiTypes.STR,
+                description=(
+                    "Autocomplete: return the names starting with or "
+                    "similar to q, best matches and most used first"
+                ),
+            ),
+            OpenApiParameter(
+                "limit",
+                OpenApiTypes.INT,
+                description=(
+                    "Maximum number of autocomplete suggestions, up to "
+                    f"{settings.RECIPE_AUTOCOMPLETE_MAX_LIMIT}"
+                ),
+            ),
         ]
     )
 )
 class BaseRecipeAttrViewSet(
+    ConditionalListMixin,
+    CachedListMixin,
     mixins.DestroyModelMixin,
     mixins.UpdateModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet,
 ):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        assigned_only = bool(self.request.query_params.get("assigned_only", 0))
-        queryset = self.queryset
+        queryset = self.queryset.filter(user=self.request.user)
+        if self._assigned_only():
+            queryset = queryset.filter(
+                assigned(self.through, self.link_column)
+            )
 
-        if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+        if self.action != "list":
+            # Detail routes look up any of the items, whatever the
+            # autocomplete, ordering and count parameters of the list
+            return queryset
+
+        term = self.request.query_params.get("q", "").strip()
+        if term:
+            # Annotates recipe_count to rank the suggestions
+            queryset = autocomplete(
+                queryset,
+                self.through,
+                self.link_column,
+                term,
+                self._autocomplete_limit(),
+            )
+        else:
+            if self._recipe_count():
+                queryset = queryset.annotate(
+                    recipe_count=usage_count(self.through, self.link_column)
+                )
+            if self._ordering() == ORDERING_POPULAR:
+                queryset = queryset.order_by("-recipe_count", "name")
+            else:
+                queryset = queryset.order_by("-name")
+
+        if self._fast_list():
+            return queryset.values(*self._list_serializer_class().columns())
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "list" and self._recipe_count():
+            return self.count_serializer_class
+        return self.serializer_class
+
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get("many") and self._fast_list():
+            return self._list_serializer_class()(*args)
+        return super().get_serializer(*args, **kwargs)
+
+    def _list_serializer_class(self):
+        if self._recipe_count():
+            return self.count_list_serializer_class
+        return self.list_serializer_class
+
+    def _fast_list(self):
+        return self.action == "list" and settings.RECIPE_FAST_LISTS
+
+    def _assigned_only(self):
+        return self.request.query_params.get("assigned_only", "0") == "1"
+
+    def _recipe_count(self):
+        """Whether to list how many recipes use each item."""
         return (
-            queryset.filter(user=self.request.user)
-            .order_by("-name")
-            .distinct()
+            self.request.query_params.get("recipe_count", "0") == "1"
+            or self._ordering() == ORDERING_POPULAR
         )
 
+    def _ordering(self):
+        ordering = self.request.query_params.get("ordering")
+        if ordering not in (None, ORDERING_POPULAR):
+            raise ValidationError(
+                {"ordering": f"Expected {ORDERING_POPULAR}."}
+            )
+        return ordering
+
+    def _autocomplete_limit(self):
+        """Number of suggestions requested with ?limit=, capped."""
+        limit = self.request.query_params.get("limit")
+        if limit is None:
+            return settings.RECIPE_AUTOCOMPLETE_LIMIT
+
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            raise ValidationError({"limit": "Expected a positive integer."})
+        return min(limit, settings.RECIPE_AUTOCOMPLETE_MAX_LIMIT)
+
 
 class TagViewSet(BaseRecipeAttrViewSet):
     serializer_class = serializers.TagSerializer
     queryset = Tag.objects.all()
+    count_serializer_class = serializers.TagCountSerializer
+    list_serializer_class = fastpath.TagListSerializer
+    count_list_serializer_class = fastpath.TagCountListSerializer
+    through = Recipe.tags.through
+    link_column = "tag_id"
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     serializer_class = serializers.IngredientSerializer
     queryset = Ingredient.objects.all()
+    count_serializer_class = serializers.IngredientCountSerializer
+    list_serializer_class = fastpath.IngredientListSerializer
+    count_list_serializer_class = fastpath.IngredientCountListSerializer
+    through = Recipe.ingredients.through
+    link_column = "ingredient_id"
@@ -1,4 +1,5 @@
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
+from core.authentication import CachedTokenAuthentication
 from user.serializers import UserSerializer, AuthTokenSerializer
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
@@ -45,7 +46,7 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     """
 
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
@@ -12,6 +12,13 @@ python manage.py collectstatic --no-input
 # Apply database migrations
 python manage.py migrate
 
+# Directory where every uWSGI worker writes its Prometheus metrics, so that
+# /api/metrics returns totals for all workers. Emptied on each start as the
+# files of workers that are gone would otherwise keep being counted.
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/vol/metrics}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # Start the uWSGI server
 # --socket :9000     Exposes a TCP socket on port 9000 for Nginx to connect to the application
 # --workers 4        Spawns 4 worker processes to handle requests